@@ -0,0 +1,174 @@
+"""
+Measure the per-node cost of the Isolation board backends: the time taken to
+copy a board and to forecast a move, and the memory retained by each board
+kept alive during search. When NumPy is installed, also compare the random
+playout throughput of `BoardBatch` with a loop over `Board` objects. Finally,
+measure the depth reached by the parallel search of `CustomPlayer`, and the
+number of playouts of its Monte Carlo search, with 1, 2 and 4 worker
+processes, next to the node rate of the alpha-beta search.
+
+Run with `python benchmark.py`.
+"""
+
+import multiprocessing
+import random
+import timeit
+import tracemalloc
+
+from isolation import Board
+from isolation import BitBoard
+from game_agent import CustomPlayer
+from sample_players import improved_score
+
+try:
+    from isolation.batch import BoardBatch
+except ImportError:
+    BoardBatch = None
+
+NUM_COPIES = 20000  # number of boards created for each measurement
+NUM_PLAYOUTS = 2000  # number of random games played for each measurement
+BACKENDS = [("Board", Board), ("BitBoard", BitBoard)]
+TIME_LIMIT = 150  # number of milliseconds per move of the parallel search
+WORKERS = [1, 2, 4]  # numbers of worker processes compared
+
+
+def midgame(board_cls, width=7, height=7):
+    """Return a board with a few moves applied to it."""
+    board = board_cls("Player1", "Player2", width, height)
+    for move in [(3, 3), (0, 0), (1, 2), (2, 2), (0, 4), (4, 3)]:
+        board.apply_move(move)
+    return board
+
+
+def time_per_call(fn, number=NUM_COPIES):
+    """Return the mean duration of a call to fn() in microseconds."""
+    return 1e6 * timeit.timeit(fn, number=number) / number
+
+
+def memory_per_board(board, number=NUM_COPIES):
+    """Return the mean number of bytes retained by each copy of a board."""
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    boards = [board.copy() for _ in range(number)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del boards
+    return (after - before) / number
+
+
+def playouts_per_second(board_cls):
+    """Return the number of random games per second played on boards of the
+    given class, one game at a time.
+    """
+    def playout():
+        board = board_cls("Player1", "Player2")
+        legal_moves = board.get_legal_moves()
+        while legal_moves:
+            board.apply_move(random.choice(legal_moves))
+            legal_moves = board.get_legal_moves()
+    return NUM_PLAYOUTS / timeit.timeit(playout, number=NUM_PLAYOUTS)
+
+
+def batch_playouts_per_second():
+    """Return the number of random games per second played by BoardBatch."""
+    return NUM_PLAYOUTS / timeit.timeit(
+        lambda: BoardBatch(NUM_PLAYOUTS).random_playout(), number=1)
+
+
+def opening_positions(agent, positions=5):
+    """Return boards a few random moves into a game, with `agent` to move."""
+    rng = random.Random(0)
+    boards = []
+    for _ in range(positions):
+        board = Board(agent, "Player2")
+        for _ in range(4):
+            board.apply_move(rng.choice(board.get_legal_moves()))
+        boards.append(board)
+    return boards
+
+
+def parallel_depth(workers, positions=5):
+    """Return the mean depth completed by the parallel search with the given
+    number of workers within TIME_LIMIT.
+    """
+    agent = CustomPlayer(score_fn=improved_score, method='alphabeta',
+                         inplace=True, ordering=('killer', 'history'),
+                         workers=workers)
+    depths = []
+    try:
+        for board in opening_positions(agent, positions):
+            deadline = timeit.default_timer() + TIME_LIMIT / 1000.
+            agent.get_move(board, board.get_legal_moves(),
+                           lambda: 1000. * (deadline - timeit.default_timer()))
+            depths.append(agent.completed_depth)
+    finally:
+        agent.close()
+    return sum(depths) / len(depths)
+
+
+def mcts_playouts(workers, positions=5):
+    """Return the mean number of playouts of the Monte Carlo search with the
+    given number of workers within TIME_LIMIT.
+    """
+    agent = CustomPlayer(method='mcts', rollout='mobility', workers=workers)
+    playouts = []
+    try:
+        for board in opening_positions(agent, positions):
+            deadline = timeit.default_timer() + TIME_LIMIT / 1000.
+            agent.get_move(board, board.get_legal_moves(),
+                           lambda: 1000. * (deadline - timeit.default_timer()))
+            playouts.append(agent.playouts)
+    finally:
+        agent.close()
+    return sum(playouts) / len(playouts)
+
+
+def alphabeta_nodes(positions=5):
+    """Return the mean number of nodes searched by the iterative deepening
+    alpha-beta search within TIME_LIMIT.
+    """
+    agent = CustomPlayer(score_fn=improved_score, method='alphabeta',
+                         inplace=True, ordering=('killer', 'history'))
+    nodes = []
+    for board in opening_positions(agent, positions):
+        deadline = timeit.default_timer() + TIME_LIMIT / 1000.
+        count = [0]
+
+        def time_left():
+            # the timer is read once per node
+            count[0] += 1
+            return 1000. * (deadline - timeit.default_timer())
+        agent.get_move(board, board.get_legal_moves(), time_left)
+        nodes.append(count[0])
+    return sum(nodes) / len(nodes)
+
+
+def main():
+    print("{:<10}{:>14}{:>16}{:>16}".format(
+        "Backend", "copy (us)", "forecast (us)", "bytes/board"))
+    for name, board_cls in BACKENDS:
+        board = midgame(board_cls)
+        move = board.get_legal_moves()[0]
+        print("{:<10}{:>14.2f}{:>16.2f}{:>16.0f}".format(
+            name,
+            time_per_call(board.copy),
+            time_per_call(lambda: board.forecast_move(move)),
+            memory_per_board(board)))
+
+    print("\n{:<10}{:>14}".format("Backend", "playouts/s"))
+    for name, board_cls in BACKENDS:
+        print("{:<10}{:>14.0f}".format(name, playouts_per_second(board_cls)))
+    if BoardBatch is not None:
+        print("{:<10}{:>14.0f}".format("BoardBatch", batch_playouts_per_second()))
+
+    # more workers than cores share the cores, which the depth reflects
+    print("\n{} cores".format(multiprocessing.cpu_count()))
+    print("{:<10}{:>14}{:>16}".format("Workers", "depth", "MCTS playouts"))
+    for workers in WORKERS:
+        print("{:<10}{:>14.1f}{:>16.0f}".format(
+            workers, parallel_depth(workers), mcts_playouts(workers)))
+    print("\nAlpha-beta nodes per move: {:.0f}".format(alphabeta_nodes()))
+
+
+if __name__ == "__main__":
+    main()
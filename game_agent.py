@@ -8,12 +8,402 @@ relative strength using tournament.py and include the results in your report.
 """
 import random
 import math
+import multiprocessing
+import sys
+import threading
+import timeit
+
+from collections import OrderedDict
+
+from isolation.book import OpeningBook
 
 
 class Timeout(Exception):
     """Subclass base exception for code clarity."""
     pass
 
+class TranspositionTable:
+    """A bounded table of alpha-beta search results keyed by the Zobrist hash
+    of the searched position (see `isolation.Board.get_hash()`).
+
+    The table is a fixed array of `size` slots indexed by `key % size`; each
+    slot holds at most one entry (key, depth, bound, score, move, generation),
+    so the memory used never grows past roughly `size * 150` bytes.
+
+    Parameters
+    ----------
+    size : int
+        The number of slots of the table.
+
+    policy : {'depth', 'always'} (optional)
+        The replacement policy used when two positions share a slot: 'depth'
+        keeps the entry searched to the greater depth unless it was stored
+        before the last call to new_search(), 'always' keeps the most recent
+        entry.
+    """
+
+    EXACT = 0
+    LOWER = 1
+    UPPER = 2
+
+    # xor-ed into the key of the positions searched on a minimizing layer,
+    # whose scores are stored apart from the maximizing ones
+    MIN_NODE = 0x9E3779B97F4A7C15
+
+    def __init__(self, size, policy='depth'):
+        if(policy not in ('depth', 'always')):
+            raise ValueError("Unknown replacement policy: {!r}".format(policy))
+        self.size = size
+        self.policy = policy
+        self.table = [None] * size
+        self.generation = 0
+
+    def __len__(self):
+        return self.size - self.table.count(None)
+
+    def clear(self):
+        """Remove all the entries of the table."""
+        self.table = [None] * self.size
+        self.generation = 0
+
+    def new_search(self):
+        """Mark the entries stored so far as old: they can still be probed,
+        but any new entry may replace them.
+        """
+        self.generation += 1
+
+    def probe(self, key, depth, alpha, beta):
+        """Look up the result stored for a position.
+
+        Parameters
+        ----------
+        key : int
+            The hash of the position.
+
+        depth : int
+            The depth the position is about to be searched to.
+
+        alpha, beta : float
+            The search window of the position.
+
+        Returns
+        -------
+        float
+            The stored score if it was searched at least `depth` plies deep
+            and its bound settles the window; None otherwise
+
+        tuple(int, int)
+            The stored best move, to be searched first; None on a miss
+        """
+        entry = self.table[key % self.size]
+        if(entry is None or entry[0] != key):
+            return None, None
+        _, entry_depth, bound, score, move, _ = entry
+        if(entry_depth >= depth and
+           (bound == self.EXACT or
+            (bound == self.LOWER and score >= beta) or
+            (bound == self.UPPER and score <= alpha))):
+            return score, move
+        return None, move
+
+    def store(self, key, depth, alpha, beta, score, move):
+        """Record the result of searching a position with the window
+        (alpha, beta) to the given depth.
+        """
+        idx = key % self.size
+        if(self.policy == 'depth'):
+            entry = self.table[idx]
+            if(entry is not None and entry[5] == self.generation and entry[1] > depth):
+                return
+        if(score <= alpha):
+            bound = self.UPPER
+        elif(score >= beta):
+            bound = self.LOWER
+        else:
+            bound = self.EXACT
+        self.table[idx] = (key, depth, bound, score, move, self.generation)
+
+class TimeManager:
+    """Schedule the iterations of iterative deepening within the time left
+    for a move.
+
+    The duration of the next iteration is predicted from the duration of the
+    last one times the effective branching factor measured between the last
+    two, and an iteration is only started if it is expected to finish. The
+    safety margin at which the search is aborted is calibrated from the time
+    actually taken to return after the margin was crossed.
+
+    Parameters
+    ----------
+    threshold : float
+        Initial safety margin (in milliseconds).
+
+    min_threshold : float (optional)
+        Lowest safety margin (in milliseconds) the calibration can choose.
+    """
+
+    SAFETY = 2.  # margin kept per millisecond taken by the slowest abort
+    SAMPLES = 8  # number of recent aborts used by the calibration
+    MAX_BRANCHING = 8.  # a knight has at most eight moves
+
+    def __init__(self, threshold, min_threshold=1.):
+        self.threshold = threshold
+        self.min_threshold = min_threshold
+        self.aborts = []
+        self.durations = []
+
+    def start_move(self):
+        """Forget the durations of the iterations of the previous move."""
+        self.durations = []
+
+    def iteration_done(self, duration):
+        """Record the duration (in milliseconds) of a completed iteration."""
+        self.durations.append(duration)
+
+    def predict(self):
+        """Return the predicted duration (in milliseconds) of the next
+        iteration, or 0 if no iteration was completed yet.
+        """
+        if(not self.durations):
+            return 0.
+        last = self.durations[-1]
+        branching = self.MAX_BRANCHING
+        # alpha-beta alternates cheap and expensive depths, so the branching
+        # factor is averaged over the last two iterations when possible
+        if(len(self.durations) > 2 and self.durations[-3] > 0):
+            branching = math.sqrt(last / self.durations[-3])
+        elif(len(self.durations) > 1 and self.durations[-2] > 0):
+            branching = last / self.durations[-2]
+        return last * min(max(branching, 1.), self.MAX_BRANCHING)
+
+    def can_start(self, time_left):
+        """Return True if the next iteration is expected to finish before
+        the safety margin is reached.
+        """
+        return time_left - self.predict() > self.threshold
+
+    def timed_out(self, time_left):
+        """Calibrate the safety margin after an aborted iteration, given the
+        time left (in milliseconds) once the search has unwound.
+        """
+        self.aborts.append(self.threshold - time_left)
+        del self.aborts[:-self.SAMPLES]
+        self.threshold = max(self.min_threshold, self.SAFETY * max(self.aborts))
+
+class EndgameSolver:
+    """Exact solver for the positions where the players are partitioned
+    (see `isolation.Board.is_partitioned()`).
+
+    Each player then moves alone in its own region, and the player to move
+    wins if and only if its longest knight path is longer than the one of
+    the opponent. Path lengths are memoised on the starting cell and the
+    bitmask of the region it can still reach, which only depend on the
+    board size, so the table stays valid from one move to the next, and
+    from one game to the next.
+
+    Parameters
+    ----------
+    max_entries : int (optional)
+        The number of memoised paths above which the table is cleared.
+    """
+
+    def __init__(self, max_entries=2 ** 16):
+        self.max_entries = max_entries
+        self.geometry = None
+        self.memo = {}
+
+    def __len__(self):
+        return len(self.memo)
+
+    def clear(self):
+        """Forget every memoised path."""
+        self.memo = {}
+
+    def path_bound(self, cell, region):
+        """Return an upper bound of the number of moves of a knight path
+        starting from a cell and moving through a region, given as the
+        bitmask of the cells it can reach.
+        """
+        # knight moves alternate between the two colours of the board, so a
+        # path uses at most one more cell of the other colour than of its own
+        geometry = self.geometry
+        row, col = geometry.cells[cell]
+        own = geometry.colours[(row + col) % 2]
+        same = bin(region & own).count("1")
+        other = bin(region & ~own).count("1")
+        return min(2 * other, 2 * same + 1)
+
+    def longest_path(self, cell, region, target=None, tick=None):
+        """Return the number of moves of the longest knight path starting
+        from a cell and moving through the open cells of a region, on a
+        board of the size last passed to `solve()`.
+
+        Parameters
+        ----------
+        cell : int
+            The index of the starting cell
+
+        region : int
+            The bitmask of the cells the path can move through
+
+        target : int (optional)
+            Stop as soon as a path of that many moves is found, in which
+            case the result is only a lower bound of at least `target`
+
+        tick : callable (optional)
+            A function called once for each path that is not memoised, which
+            can abort the search by raising an exception
+        """
+        geometry = self.geometry
+        region = geometry.reachable(cell, region)
+        key = (cell, region)
+        entry = self.memo.get(key)
+        if(entry is not None and (entry[1] or (target is not None and entry[0] >= target))):
+            return entry[0]
+        if(tick is not None):
+            tick()
+
+        bound = self.path_bound(cell, region)
+        if(target is None or target > bound):
+            target = bound
+
+        length = 0
+        moves = geometry.masks[cell] & region
+        while moves and length < target:
+            low = moves & -moves
+            moves ^= low
+            length = max(length, 1 + self.longest_path(low.bit_length() - 1, region ^ low,
+                                                       target - 1, tick))
+        if(len(self.memo) >= self.max_entries):
+            self.memo = {}
+        # the search was only cut short if it reached the target
+        self.memo[key] = (length, length < target or length == bound)
+        return length
+
+    def solve(self, game, tick=None):
+        """Solve a partitioned position for the player to move.
+
+        Parameters
+        ----------
+        game : isolation.Board
+            A position where `is_partitioned()` is True
+
+        tick : callable (optional)
+            See `longest_path()`
+
+        Returns
+        -------
+        float
+            +inf if the player to move wins, -inf if it loses
+
+        tuple(int, int)
+            A winning move, or the first move of the longest path of the
+            player to move if it loses; (-1, -1) if it has no legal moves
+        """
+        if(game.__geometry__ is not self.geometry):
+            self.geometry = game.__geometry__
+            self.memo = {}
+        open_mask = game.__open_mask__()
+        own_cell = game.__player_cell__(game.active_player)
+        opp_cell = game.__player_cell__(game.inactive_player)
+        # the opponent path only matters up to the longest path the player
+        # to move could have, past which it loses anyway
+        own_bound = self.path_bound(own_cell, self.geometry.reachable(own_cell, open_mask))
+        opp_length = self.longest_path(opp_cell, open_mask, own_bound, tick)
+
+        # the player to move runs out of moves first unless its path is
+        # longer: any move followed by a path of opp_length moves wins
+        best_length, best_move = -1, (-1, -1)
+        moves = self.geometry.masks[own_cell] & open_mask
+        while moves:
+            low = moves & -moves
+            moves ^= low
+            cell = low.bit_length() - 1
+            length = 1 + self.longest_path(cell, open_mask ^ low, opp_length, tick)
+            if(length > best_length):
+                best_length, best_move = length, self.geometry.cells[cell]
+            if(length > opp_length):
+                return float('inf'), best_move
+        return float('-inf'), best_move
+
+
+class EvaluationCache:
+    """Bounded least-recently-used memo of a score function, keyed by the
+    Zobrist hash of the position and by whether the player scored is the
+    one to move.
+
+    Any `score_fn(game, player)` that only depends on the position and the
+    player can be wrapped; the cache is then called in its place. Use one
+    cache per player, since the key does not tell two players with the same
+    role apart.
+
+    Parameters
+    ----------
+    score_fn : callable
+        The score function to memoise.
+
+    size : int (optional)
+        The number of scores kept; the least recently used one is evicted
+        when a new score is stored in a full cache.
+    """
+
+    def __init__(self, score_fn, size=2 ** 16):
+        if(size < 1):
+            raise ValueError("The evaluation cache must hold at least one score.")
+        self.score_fn = score_fn
+        self.size = size
+        self.table = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.table)
+
+    def __call__(self, game, player):
+        key = (game.get_hash(), player == game.active_player)
+        table = self.table
+        score = table.get(key)
+        if(score is not None):
+            table.move_to_end(key)
+            self.hits += 1
+            return score
+        self.misses += 1
+        score = self.score_fn(game, player)
+        table[key] = score
+        if(len(table) > self.size):
+            table.popitem(last=False)
+            self.evictions += 1
+        return score
+
+    def clear(self):
+        """Forget every score and reset the counters."""
+        self.table.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+class MCTSNode:
+    """A node of the Monte Carlo search tree, reached by playing `move` from
+    its parent.
+
+    `wins` counts the playouts through the node won by the player who played
+    `move`, and `untried` lists the legal moves of the position that have no
+    child node yet.
+    """
+
+    __slots__ = ('move', 'parent', 'children', 'untried', 'visits', 'wins')
+
+    def __init__(self, move, parent, untried):
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0
+
+
 def distance(p0, p1):
     return math.sqrt((p0[0] - p1[0])**2 + (p0[1] - p1[1])**2)
 
@@ -44,8 +434,8 @@ def custom_score(game, player):
     if game.is_winner(player):
         return float("inf")
 
-    own_moves = len(game.get_legal_moves(player))
-    opp_moves = len(game.get_legal_moves(game.get_opponent(player)))
+    own_moves = game.count_legal_moves(player)
+    opp_moves = game.count_legal_moves(game.get_opponent(player))
 
     if(hasattr(player, 'q1')):
         available_spaces = game.get_blank_spaces()   
@@ -92,8 +482,8 @@ def custom_score_center(game, player):
     d = distance(game.get_player_location(player), (float(game.height)/2, float(game.width)/2))
     d2 = distance(game.get_player_location(game.get_opponent(player)), (float(game.height)/2, float(game.width)/2))
 
-    return float(len(game.get_legal_moves(player)) - \
-                 len(game.get_legal_moves(game.get_opponent(player)))) - d + d2
+    return float(game.count_legal_moves(player) - \
+                 game.count_legal_moves(game.get_opponent(player))) - d + d2
 	
 def custom_score_distance(game, player):
     """The "Improved" evaluation function discussed in lecture that outputs a
@@ -123,7 +513,7 @@ def custom_score_distance(game, player):
         return float("inf")
 
     d = distance(game.get_player_location(player), game.get_player_location(game.get_opponent(player)))
-    return d + float(len(game.get_legal_moves(player)) - len(game.get_legal_moves(game.get_opponent(player))))
+    return d + float(game.count_legal_moves(player) - game.count_legal_moves(game.get_opponent(player)))
 	
 def custom_score_h1_full_distance(game, player):
     """Calculate the heuristic value of a game state from the point of view
@@ -164,8 +554,8 @@ def custom_score_h1_full_distance(game, player):
     
     better_place = max([(available_q1, player.b1), (available_q2, player.b2), (available_q3, player.b3), (available_q4, player.b4)])
     
-    own_moves = len(game.get_legal_moves(player))
-    opp_moves = len(game.get_legal_moves(game.get_opponent(player)))
+    own_moves = game.count_legal_moves(player)
+    opp_moves = game.count_legal_moves(game.get_opponent(player))
     """return float(own_moves - opp_moves) + \
         distance(better_place[1], game.get_player_location(game.get_opponent(player))) - \
         distance(better_place[1], game.get_player_location(player))"""
@@ -211,8 +601,8 @@ def custom_score_h1_full_mixed(game, player):
     
     better_place = max([(available_q1, player.b1), (available_q2, player.b2), (available_q3, player.b3), (available_q4, player.b4)])
     
-    own_moves = len(game.get_legal_moves(player))
-    opp_moves = len(game.get_legal_moves(game.get_opponent(player)))
+    own_moves = game.count_legal_moves(player)
+    opp_moves = game.count_legal_moves(game.get_opponent(player))
     return float(own_moves - opp_moves) + \
             distance(better_place[1], game.get_player_location(game.get_opponent(player))) - \
             distance(better_place[1], game.get_player_location(player))
@@ -249,8 +639,8 @@ def custom_score_h1_begin_mixed(game, player):
         return float("inf")
 
     available_spaces = game.get_blank_spaces()
-    own_moves = len(game.get_legal_moves(player))
-    opp_moves = len(game.get_legal_moves(game.get_opponent(player)))
+    own_moves = game.count_legal_moves(player)
+    opp_moves = game.count_legal_moves(game.get_opponent(player))
     if(len(available_spaces) >= (game.width * game.height) / 2):
         available_q1 = len([x for x in available_spaces if x in player.q1])
         available_q2 = len([x for x in available_spaces if x in player.q2])
@@ -297,8 +687,8 @@ def custom_score_h1_begin_distance(game, player):
         return float("inf")
 
     available_spaces = game.get_blank_spaces()
-    own_moves = len(game.get_legal_moves(player))
-    opp_moves = len(game.get_legal_moves(game.get_opponent(player)))
+    own_moves = game.count_legal_moves(player)
+    opp_moves = game.count_legal_moves(game.get_opponent(player))
     if(len(available_spaces) >= (game.width * game.height) / 2):
         available_q1 = len([x for x in available_spaces if x in player.q1])
         available_q2 = len([x for x in available_spaces if x in player.q2])
@@ -333,21 +723,186 @@ class CustomPlayer:
         Flag indicating whether to perform fixed-depth search (False) or
         iterative deepening search (True).
 
-    method : {'minimax', 'alphabeta'} (optional)
-        The name of the search method to use in get_move().
+    method : {'minimax', 'alphabeta', 'pvs', 'mcts'} (optional)
+        The name of the search method to use in get_move(). 'pvs' is the
+        alpha-beta search in Principal Variation Search mode: the first move
+        of each node is searched with the full window and the others with a
+        null window, searching them again only if they fail high. 'mcts' is
+        a Monte Carlo Tree Search (UCT) that runs playouts until the timer
+        reaches `timeout` and plays the most visited move; it ignores
+        `search_depth`, `iterative` and the alpha-beta options.
 
     timeout : float (optional)
         Time remaining (in milliseconds) when search is aborted. Should be a
         positive value large enough to allow the function to return before the
         timer expires.
+
+    inplace : boolean (optional)
+        Flag indicating whether the search expands each node on a copy of the
+        board made with forecast_move() (False) or walks the game tree on a
+        single board with apply_move() and undo_move() (True).
+
+    tt_size : int (optional)
+        The number of entries of the transposition table consulted by the
+        alpha-beta search (about 150 bytes each); 0 disables the table.
+
+    tt_policy : {'depth', 'always'} (optional)
+        The replacement policy of the transposition table.
+
+    ordering : sequence of {'killer', 'history', 'mobility'} (optional)
+        The move ordering heuristics used by the alpha-beta search: 'killer'
+        searches first the last two moves that caused a cutoff at the same
+        ply, 'history' sorts the moves by the cutoffs they caused anywhere in
+        the tree, and 'mobility' sorts the moves by the number of moves left
+        to the opponent (fewest first). By default the moves are searched in
+        the order of get_legal_moves().
+
+    pv_reuse : boolean (optional)
+        Flag indicating whether the alpha-beta search records its principal
+        variation (the sequence of best moves for both players) and searches
+        it first at the next iteration of iterative deepening.
+
+    aspiration : float (optional)
+        Half-width of the aspiration window centred on the score of the
+        previous iteration of iterative deepening, used by the alpha-beta
+        searches; the search is repeated with the full window if the score
+        falls outside. If None, every iteration uses the full window.
+
+    ponder : float (optional)
+        Maximum time (in milliseconds) spent searching in a background thread
+        while the opponent is thinking, on the position reached by the reply
+        predicted by the principal variation; 0 disables pondering. If the
+        opponent plays the predicted reply, the next get_move() resumes the
+        iterative deepening where the pondering search stopped. The thread
+        shares the interpreter lock with the opponent, so pondering only
+        pays off when the opponent spends its time outside of Python code.
+
+    workers : int (optional)
+        The number of processes used by the iterative deepening search. With
+        more than one worker, the legal moves at the root are split across a
+        pool of processes which deepen their share of the moves until the
+        timer expires, and the results of the deepest iteration completed by
+        every worker are merged. Call close() to stop the pool.
+
+    persistent : boolean (optional)
+        Flag indicating whether the transposition table, the killer moves,
+        the history table and the principal variation are kept from one
+        get_move() call to the next within a game. They are reset when the
+        board passed to get_move() does not follow from the previous one
+        (i.e., a new game has started).
+
+    adaptive_time : boolean (optional)
+        Flag indicating whether iterative deepening is scheduled by a
+        `TimeManager`: a depth is not started if it is not expected to finish
+        in the time left, and `timeout` is only the initial safety margin,
+        recalibrated after each aborted iteration.
+
+    check_interval : int or 'auto' (optional)
+        The number of nodes searched between two reads of the timer. With
+        'auto', the interval is tuned during the search so that the timer is
+        read about every `CHECK_GRANULARITY` milliseconds; `timeout` must
+        then leave room for that much search after the margin is crossed.
+
+    endgame : boolean (optional)
+        Flag indicating whether get_move() switches to an `EndgameSolver`
+        once the players are partitioned, returning a proven move instead of
+        running the search; `solved` then reports that it did. The solver may
+        use `ENDGAME_SHARE` of the time, after which the search takes over.
+
+    endgame_size : int (optional)
+        The number of longest paths memoised by the `EndgameSolver`, which
+        keeps them from one move to the next.
+
+    book : str (optional)
+        The path of an opening book file (see `isolation.book` and
+        `opening_book.py`). get_move() plays the book move of the positions
+        covered by the book instead of searching them.
+
+    rollout : {'random', 'mobility'} (optional)
+        The playout policy of the 'mcts' method: 'random' plays uniformly
+        random moves, and 'mobility' plays the better of two random moves,
+        the one leaving the player more moves from its new cell.
+
+    eval_cache : int (optional)
+        The number of scores memoised by an `EvaluationCache` wrapped around
+        `score_fn`; 0 calls `score_fn` directly.
     """
 
+    ORDERINGS = ('killer', 'history', 'mobility')
+    PONDER_COST = 1.  # initial estimate (in milliseconds) of start_pondering()
+    ENDGAME_SHARE = 0.5  # share of the time left the endgame solver may use
+    ROLLOUTS = ('random', 'mobility')
+    UCT_EXPLORATION = math.sqrt(2)  # weight of the exploration term of UCT
+    CHECK_GRANULARITY = 0.5  # milliseconds between two reads of the timer
+    MAX_CHECK_INTERVAL = 1024  # most nodes searched between two reads
+
     def __init__(self, search_depth=3, score_fn=custom_score,
-                 iterative=True, method='minimax', timeout=10.):
+                 iterative=True, method='minimax', timeout=10., inplace=False,
+                 tt_size=0, tt_policy='depth', ordering=(), pv_reuse=False,
+                 aspiration=None, ponder=0., workers=1, persistent=False,
+                 adaptive_time=False, check_interval=1, endgame=False, book=None,
+                 rollout='random', eval_cache=0, endgame_size=2 ** 16):
         self.search_depth = search_depth
         self.iterative = iterative
         self.score = score_fn
+        if(eval_cache > 0):
+            self.score = EvaluationCache(score_fn, eval_cache)
         self.method = method
+        self.inplace = inplace
+        self.tt = None
+        if(tt_size > 0):
+            self.tt = TranspositionTable(tt_size, tt_policy)
+        for name in ordering:
+            if(name not in self.ORDERINGS):
+                raise ValueError("Unknown move ordering: {!r}".format(name))
+        self.ordering = frozenset(ordering)
+        self.killers = {}
+        self.history = {}
+        self.root_depth = 0
+        self.pv_reuse = pv_reuse
+        self.pv = []
+        self.pv_table = {}
+        self.follow_pv = False
+        self.aspiration = aspiration
+        self.ponder = ponder
+        self.ponder_cost = self.PONDER_COST
+        self.ponder_thread = None
+        self.ponder_stop = None
+        self.ponder_hash = None
+        self.ponder_result = None
+        self.workers = workers
+        self.pool = None
+        self.completed_depth = 0
+        self.persistent = persistent
+        self.last_game = None
+        self.exact = False
+        self.time_manager = None
+        if(adaptive_time):
+            self.time_manager = TimeManager(timeout)
+        if(check_interval != 'auto' and not (isinstance(check_interval, int) and check_interval >= 1)):
+            raise ValueError("Unknown check interval: {!r}".format(check_interval))
+        self.check_interval = check_interval
+        self.node_interval = 1 if check_interval == 'auto' else check_interval
+        self.nodes_left = 1
+        self.last_check = None
+        self.endgame = EndgameSolver(endgame_size) if endgame else None
+        self.solved = False
+        self.book = OpeningBook(book) if book is not None else None
+        if(rollout not in self.ROLLOUTS):
+            raise ValueError("Unknown rollout policy: {!r}".format(rollout))
+        self.rollout = rollout
+        self.rng = random.Random()
+        self.playouts = 0
+        if(workers > 1):
+            # the workers run the same search on their share of the root
+            # moves, and stop by themselves when the deadline is reached
+            config = dict(score_fn=score_fn, method=method, timeout=0.,
+                          inplace=inplace, tt_size=tt_size, tt_policy=tt_policy,
+                          ordering=tuple(ordering), pv_reuse=pv_reuse,
+                          check_interval=check_interval, rollout=rollout,
+                          eval_cache=eval_cache)
+            self.pool = multiprocessing.Pool(workers, initializer=init_parallel_worker,
+                                             initargs=(config,))
         self.time_left = None
         self.TIMER_THRESHOLD = timeout
         self.q1 = None
@@ -414,7 +969,18 @@ class CustomPlayer:
             (-1, -1) if there are no available legal moves.
         """
 
-        self.time_left = time_left
+        # the pondering search must be stopped before the timer is replaced
+        was_pondering = self.ponder_thread is not None
+        pondered = self.stop_pondering(game)
+        # the time needed to start pondering is kept out of the search
+        reserve = self.ponder_reserve()
+        if(reserve > 0):
+            self.start_timer(lambda: time_left() - reserve)
+        else:
+            self.start_timer(time_left)
+        timer = self.time_left
+        new_game = self.is_new_game(game)
+        self.solved = False
 
         # TODO: finish this function!
 
@@ -427,6 +993,11 @@ class CustomPlayer:
             self.q1, self.q2, self.q3, self.q4, self.b1, self.b2, self.b3, self.b4 = \
                 self.create_quarter(game.width, game.height)
 
+        if(self.book is not None and self.book.covers(game)):
+            move = self.book.lookup(game)
+            if(move in legal_moves):
+                return move
+
         if(len(legal_moves) == (game.width * game.height)):
             # opening move of player 1: take the center of the board
             return ( int(game.width/2), int(game.height/2))
@@ -439,44 +1010,519 @@ class CustomPlayer:
         else:
             best_move = legal_moves[0]
 
+        first_depth = 1
+        score = None
+        self.completed_depth = 0
+        if(pondered is not None and not new_game):
+            # the opponent played the predicted reply: resume the iterative
+            # deepening after the last depth completed while pondering
+            depth, score, best_move = pondered
+            first_depth = depth + 1
+            self.completed_depth = depth
+        elif(self.persistent and not new_game):
+            self.carry_search_state(game, was_pondering)
+            if(self.pv and self.pv[0] in legal_moves):
+                best_move = self.pv[0]
+        else:
+            self.reset_search_state()
+
+        solution = None
+        if(self.endgame is not None and game.is_partitioned()):
+            # the players can no longer interact: the longest paths of both
+            # players decide the game, unless they take too long to find
+            solution = self.solve_endgame(game)
+
         try:
             # The search method call (alpha beta or minimax) should happen in
             # here in order to avoid timeout. The try/except block will
             # automatically catch the exception raised by the search method
             # when the timer gets close to expiring
 
-            if(self.iterative):
-                for idx in range(1, game.width * game.height):
-                    if(self.method == 'minimax'):
-                        score, best_move = self.minimax(game, idx)
-                    if(self.method == 'alphabeta'):
-                        score, best_move = self.alphabeta(game, idx)
+            if(solution is not None):
+                score, best_move = solution
+                self.completed_depth = self.max_depth(game)
+                self.exact = True
+                self.solved = True
+            elif(self.method == 'mcts' and self.pool is not None):
+                best_move = self.parallel_mcts(game, best_move)
+            elif(self.method == 'mcts'):
+                # the search stops by itself when the timer runs out
+                root = self.mcts(game)
+                if(root.children):
+                    best_move = max(root.children, key=lambda child: child.visits).move
+            elif(self.iterative and self.pool is not None):
+                best_move = self.parallel_search(game, legal_moves, best_move)
+            elif(self.iterative):
+                if(self.time_manager is not None):
+                    self.time_manager.start_move()
+                for idx in range(first_depth, self.max_depth(game) + 1):
+                    if(self.time_manager is not None):
+                        start = self.time_left()
+                        if(not self.time_manager.can_start(start)):
+                            break
+                    score, move = self.search(game, idx, score)
+                    self.completed_depth = idx
+                    if(self.time_manager is not None):
+                        self.time_manager.iteration_done(start - self.time_left())
+                    # a deeper search that finds every move lost returns no
+                    # move: keep the one that held out at the previous depth
+                    if(move in legal_moves):
+                        best_move = move
+                    if(self.exact or math.isinf(score)):
+                        break
             else:
                 depth = game.width * game.height # max possible depth
                 if(self.search_depth >= 1): depth = self.search_depth
                 if(self.method == 'minimax'):
                     score, best_move = self.minimax(game, depth)
-                if(self.method == 'alphabeta'):
+                if(self.method in ('alphabeta', 'pvs')):
                     score, best_move = self.alphabeta(game, depth)
 
         except Timeout:
             # Handle any actions required at timeout, if necessary
+            aborted = True
             if( (len(legal_moves) > 0) and (best_move == (-1, -1))):
                 print('Timeout error condition')
+        else:
+            # Return the best move from the last completed search iteration
+            aborted = False
+            if( (len(legal_moves) > 0) and (best_move == (-1, -1))):
+                print('Normal error condition ', self.iterative)
+
+        self.start_pondering(game, best_move)
+        if(aborted and self.time_manager is not None):
+            # calibrate on the time left once pondering has started, right
+            # before returning (the pondering thread replaces self.time_left)
+            self.time_manager.timed_out(timer())
+            self.TIMER_THRESHOLD = self.time_manager.threshold
+        return best_move
+
+    def solve_endgame(self, game):
+        """Solve a partitioned position with the endgame solver, which may
+        use `ENDGAME_SHARE` of the time left before the safety margin.
+
+        Returns
+        -------
+        (float, (int, int)) or None
+            The result of `EndgameSolver.solve()`, or None if the solver ran
+            out of time, in which case the search has the rest of the time
+        """
+        timer = self.time_left
+        keep = (1 - self.ENDGAME_SHARE) * max(timer() - self.TIMER_THRESHOLD, 0)
+        self.start_timer(lambda: timer() - keep)
+        try:
+            return self.endgame.solve(game, self.count_node)
+        except Timeout:
+            return None
+        finally:
+            self.start_timer(timer)
+
+    def is_new_game(self, game):
+        """Return True unless the given board can follow the board of the
+        previous call to get_move() in the same game: same size and players,
+        more moves played, and every cell blocked then still blocked.
+        """
+        blocked = set(game.__blocked_cells__())
+        state = (game.width, game.height, game.get_opponent(self), game.move_count, blocked)
+        last, self.last_game = self.last_game, state
+        return (last is None or last[:3] != state[:3] or last[3] >= state[3] or
+                not last[4] <= blocked)
+
+    def reset_search_state(self):
+        """Forget the search state kept from previous moves."""
+        if(self.tt is not None):
+            self.tt.clear()
+        self.killers = {}
+        self.history = {}
+        self.pv = []
+
+    def carry_search_state(self, game, pondered):
+        """Adapt the search state of the previous move to the current one,
+        two plies deeper in the same game.
+
+        Parameters
+        ----------
+        game : isolation.Board
+            The current position, with this player to move
+
+        pondered : bool
+            Flag indicating whether a pondering search ran since the previous
+            move, in which case the killer moves already belong to a root at
+            the current ply
+        """
+        if(self.tt is not None):
+            self.tt.new_search()
+        # the history counts are halved so that recent cutoffs weigh more
+        self.history = dict((m, h // 2) for m, h in self.history.items() if h > 1)
+        if(not pondered):
+            self.killers = dict((ply - 2, k) for ply, k in self.killers.items() if ply >= 2)
+        # the principal variation still holds if both players followed it
+        moves = [game.get_player_location(self), game.get_player_location(game.get_opponent(self))]
+        if(len(self.pv) > 2 and self.pv[:2] == moves):
+            self.pv = self.pv[2:]
+        else:
+            self.pv = []
+
+    def max_depth(self, game):
+        """Return the depth at which a search of the game is exact: each
+        move blocks a cell, so the game ends within as many plies as there
+        are blank cells.
+        """
+        return len(game.get_blank_spaces())
+
+    def search(self, game, depth, guess=None):
+        """Run one iteration of iterative deepening with the search method
+        selected by `self.method`.
+
+        Parameters
+        ----------
+        game : isolation.Board
+            The position to search, with this player to move
+
+        depth : int
+            The depth of the iteration
+
+        guess : float (optional)
+            The score of the previous iteration, used to centre the
+            aspiration window of the alpha-beta searches
+
+        Returns
+        -------
+        float
+            The score of the position
+
+        tuple(int, int)
+            The best move; (-1, -1) for no legal moves
+        """
+        if(self.method == 'minimax'):
+            return self.minimax(game, depth)
+        return self.aspiration_search(game, depth, guess)
+
+    def parallel_search(self, game, legal_moves, best_move):
+        """Split the legal moves across the worker processes, which deepen
+        the search on their share of the moves until the timer expires, and
+        merge their results.
+
+        Parameters
+        ----------
+        game : isolation.Board
+            The position to search, with this player to move
+
+        legal_moves : list<(int, int)>
+            The legal moves of this player
+
+        best_move : tuple(int, int)
+            The move returned if no worker completes an iteration
+
+        Returns
+        -------
+        tuple(int, int)
+            The best move found at the deepest depth completed by all the
+            workers, or a proven win found at any depth
+        """
+        timer = timeit.default_timer
+        now = timer()
+        # the workers stop one threshold before the results are collected,
+        # leaving that much time to send them back
+        collect = now + (self.time_left() - self.TIMER_THRESHOLD) / 1000.
+        deadline = collect - self.TIMER_THRESHOLD / 1000.
+        if(deadline <= now):
             return best_move
 
-        # Return the best move from the last completed search iteration
-        if( (len(legal_moves) > 0) and (best_move == (-1, -1))):
-                print('Normal error condition ', self.iterative)
+        own_index = 0 if game.__player_1__ is self else 1
+        state = game.to_int()
+        jobs = [self.pool.apply_async(parallel_worker_search,
+                                      (type(game), state, own_index,
+                                       legal_moves[idx::self.workers], deadline))
+                for idx in range(min(self.workers, len(legal_moves)))]
+        results = []
+        for job in jobs:
+            try:
+                results.append(job.get(max(0., collect - timer())))
+            except multiprocessing.TimeoutError:
+                results.append([])
+
+        # a worker stops deepening once its share of the moves is proven won
+        # or lost, and its last result then holds at every greater depth
+        def completed(result):
+            if(result and math.isinf(result[-1][0])):
+                return game.width * game.height
+            return len(result)
+        depth = min(completed(r) for r in results)
+        self.completed_depth = min(depth, max(len(r) for r in results))
+        if(depth == 0):
+            wins = [r[-1][1] for r in results if r and r[-1][0] == float('inf')]
+            return wins[0] if wins else best_move
+
+        best_score = None
+        for r in results:
+            score, move = r[min(depth, len(r)) - 1]
+            if(best_score is None or score > best_score):
+                best_score, best_move = score, move
         return best_move
 
-    def minimax_max(self, game, depth, maximizing_player=True):
+    def parallel_mcts(self, game, best_move):
+        """Run an independent Monte Carlo search in each worker process and
+        return the move with the most visits summed over the workers, or
+        `best_move` if no worker returns in time.
+        """
+        timer = timeit.default_timer
+        now = timer()
+        collect = now + (self.time_left() - self.TIMER_THRESHOLD) / 1000.
+        deadline = collect - self.TIMER_THRESHOLD / 1000.
+        if(deadline <= now):
+            return best_move
 
-        if self.time_left() < self.TIMER_THRESHOLD:
+        own_index = 0 if game.__player_1__ is self else 1
+        state = game.to_int()
+        jobs = [self.pool.apply_async(parallel_worker_mcts,
+                                      (type(game), state, own_index, deadline))
+                for _ in range(self.workers)]
+        visits = {}
+        self.playouts = 0
+        for job in jobs:
+            try:
+                playouts, counts = job.get(max(0., collect - timer()))
+            except multiprocessing.TimeoutError:
+                continue
+            self.playouts += playouts
+            for move, count in counts:
+                visits[move] = visits.get(move, 0) + count
+        if(not visits):
+            return best_move
+        return max(visits, key=visits.get)
+
+    def mcts(self, game):
+        """Run Monte Carlo Tree Search from `game` until `time_left()` reaches
+        the safety margin, without raising Timeout.
+
+        Each playout descends the tree by UCT, adds one node for an untried
+        move, and plays the game out with the rollout policy. The moves are
+        applied to a single copy of the board and undone afterwards. The
+        number of playouts is stored in `self.playouts`.
+
+        Parameters
+        ----------
+        game : isolation.Board
+            The position to search, with this player to move
+
+        Returns
+        -------
+        MCTSNode
+            The root of the search tree; its children hold the visit count of
+            each legal move
+        """
+        board = game.copy()
+        rng = self.rng
+        mobility = self.rollout == 'mobility'
+        exploration = self.UCT_EXPLORATION
+        root = MCTSNode(None, None, board.get_legal_moves())
+        self.playouts = 0
+        while(self.time_left() > self.TIMER_THRESHOLD):
+            # selection
+            node, depth = root, 0
+            while(not node.untried and node.children):
+                log_visits = math.log(node.visits)
+                best_value = None
+                for child in node.children:
+                    value = child.wins / child.visits + \
+                        exploration * math.sqrt(log_visits / child.visits)
+                    if(best_value is None or value > best_value):
+                        best_value, node = value, child
+                board.apply_move(node.move)
+                depth += 1
+
+            # expansion
+            if(node.untried):
+                move = node.untried.pop(rng.randrange(len(node.untried)))
+                board.apply_move(move)
+                depth += 1
+                child = MCTSNode(move, node, board.get_legal_moves())
+                node.children.append(child)
+                node = child
+
+            # rollout
+            plies = 0
+            moves = board.get_legal_moves()
+            while(moves):
+                move = moves[rng.randrange(len(moves))]
+                if(mobility and len(moves) > 1):
+                    other = moves[rng.randrange(len(moves))]
+                    if(board.get_degree(other) > board.get_degree(move)):
+                        move = other
+                board.apply_move(move)
+                plies += 1
+                moves = board.get_legal_moves()
+            for _ in range(plies):
+                board.undo_move()
+
+            # backpropagation: the player to move after `total` plies lost, so
+            # the nodes reached after the same parity of plies were won by the
+            # player who moved into them
+            total = depth + plies
+            while(node is not root):
+                node.visits += 1
+                if((total - depth) % 2 == 0):
+                    node.wins += 1
+                board.undo_move()
+                node = node.parent
+                depth -= 1
+            root.visits += 1
+            self.playouts += 1
+        return root
+
+    def close(self):
+        """Stop the worker processes of the parallel search and unmap the
+        opening book, if any."""
+        if(self.pool is not None):
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+        if(self.book is not None):
+            self.book.close()
+            self.book = None
+
+    def predict_reply(self, game, move):
+        """Return the reply of the opponent expected after the given move
+        is played on `game`: the next move of the principal variation if it
+        starts with the move, otherwise the reply that leaves this player
+        with the fewest legal moves; None if the opponent cannot move.
+        """
+        board = game.forecast_move(move)
+        replies = board.get_legal_moves()
+        if(not replies):
+            return None
+        if(len(self.pv) > 1 and self.pv[0] == move and self.pv[1] in replies):
+            return self.pv[1]
+        return min(replies, key=lambda m: len(board.forecast_move(m).get_legal_moves(self)))
+
+    def can_ponder(self):
+        """Return True if get_move() may start a pondering search."""
+        return self.ponder > 0 and self.iterative and self.method != 'mcts'
+
+    def ponder_reserve(self):
+        """Return the time (in milliseconds) that get_move() keeps on the
+        clock to start pondering: the largest cost of start_pondering() seen
+        so far, plus one switch interval of the interpreter lock, which the
+        new thread may hold before get_move() gets to return.
+        """
+        if(not self.can_ponder()):
+            return 0.
+        return 1000. * sys.getswitchinterval() + self.ponder_cost
+
+    def start_pondering(self, game, move):
+        """Start searching, in a background thread, the position reached
+        after the given move and the reply predicted by predict_reply().
+        """
+        if(not self.can_ponder() or self.solved or move not in game.get_legal_moves()):
+            return
+        start = timeit.default_timer()
+        reply = self.predict_reply(game, move)
+        if(reply is None):
+            return
+        board = game.forecast_move(move)
+        board.apply_move(reply)
+        if(board.count_legal_moves() == 0):
+            return
+
+        # the principal variation continues after the predicted reply
+        if(len(self.pv) > 1 and self.pv[0] == move and self.pv[1] == reply):
+            self.pv = self.pv[2:]
+        else:
+            self.pv = []
+        self.ponder_hash = board.get_hash()
+        self.ponder_result = None
+        self.ponder_stop = threading.Event()
+        self.ponder_thread = threading.Thread(target=self.ponder_search,
+                                              args=(board, self.ponder_stop))
+        self.ponder_thread.daemon = True
+        self.ponder_cost = max(self.ponder_cost, 1000. * (timeit.default_timer() - start))
+        self.ponder_thread.start()
+
+    def ponder_search(self, game, stop):
+        """Run the iterative deepening on `game` until `stop` is set or the
+        pondering time runs out, recording the result of each completed
+        iteration in `self.ponder_result` as (depth, score, move).
+        """
+        deadline = timeit.default_timer() + self.ponder / 1000.
+        def time_left():
+            if(stop.is_set()):
+                return float('-inf')
+            return 1000. * (deadline - timeit.default_timer())
+        self.start_timer(time_left)
+
+        score = None
+        try:
+            for idx in range(1, self.max_depth(game) + 1):
+                score, move = self.search(game, idx, score)
+                if(move in game.get_legal_moves()):
+                    self.ponder_result = (idx, score, move)
+                if(self.exact or math.isinf(score)):
+                    break
+        except Timeout:
+            pass
+
+    def stop_pondering(self, game):
+        """Stop the pondering search, if any, and return its last result as
+        (depth, score, move) if it searched the given position; None
+        otherwise.
+        """
+        if(self.ponder_thread is None):
+            return None
+        self.ponder_stop.set()
+        self.ponder_thread.join()
+        self.ponder_thread = None
+        if(self.ponder_result is None or game.get_hash() != self.ponder_hash):
+            return None
+        return self.ponder_result
+
+    def start_timer(self, time_left):
+        """Use a new timer function for the following searches; the first
+        node searched reads it.
+        """
+        self.time_left = time_left
+        self.nodes_left = 1
+        self.last_check = None
+
+    def count_node(self):
+        """Count a node searched outside of the search methods, reading the
+        timer when `check_time()` is due.
+        """
+        self.nodes_left -= 1
+        if(self.nodes_left <= 0):
+            self.check_time()
+
+    def check_time(self):
+        """Read the timer once every `node_interval` nodes searched, raise
+        Timeout when the safety margin is reached, and tune the interval when
+        `check_interval` is 'auto'.
+
+        The interval is scaled by the ratio of `CHECK_GRANULARITY` to the time
+        elapsed since the previous read, and at most doubled at each read, so
+        that a sudden drop in the node rate cannot overshoot the margin by
+        more than a few intervals.
+        """
+        time_left = self.time_left()
+        if(time_left < self.TIMER_THRESHOLD):
             raise Timeout()
+        if(self.check_interval == 'auto'):
+            if(self.last_check is not None):
+                interval = 2 * self.node_interval
+                elapsed = self.last_check - time_left
+                if(elapsed > 0):
+                    interval = min(interval, int(self.node_interval * self.CHECK_GRANULARITY / elapsed))
+                self.node_interval = min(max(interval, 1), self.MAX_CHECK_INTERVAL)
+            self.last_check = time_left
+        self.nodes_left = self.node_interval
+
+    def minimax_max(self, game, depth, maximizing_player=True):
+
+        self.nodes_left -= 1
+        if(self.nodes_left <= 0):
+            self.check_time()
 
         # exit condition1 : leaf node
-        if(len(game.get_legal_moves()) == 0):
+        if(game.count_legal_moves() == 0):
             exit_score = self.score(game, self)
             if(exit_score == float('inf')):
                 return exit_score, game.get_player_location(self)
@@ -485,6 +1531,7 @@ class CustomPlayer:
 
         #exit condition 2 : max fixed depth reached
         if(depth == 0):
+           self.exact = False
            return self.score(game, self), game.get_player_location(self)
 
         score = float("-inf")
@@ -492,7 +1539,12 @@ class CustomPlayer:
 
         legal_move = game.get_legal_moves()
         for m in legal_move:
-            new_score, notmove = self.minimax_min(game.forecast_move(m), depth - 1, not maximizing_player)
+            if(self.inplace):
+                game.apply_move(m)
+                new_score, notmove = self.minimax_min(game, depth - 1, not maximizing_player)
+                game.undo_move()
+            else:
+                new_score, notmove = self.minimax_min(game.forecast_move(m), depth - 1, not maximizing_player)
             if( (new_score > score) or (new_score == float('inf'))):
                 score = new_score
                 move = m
@@ -500,11 +1552,12 @@ class CustomPlayer:
 
     def minimax_min(self, game, depth, maximizing_player=True):
 
-        if self.time_left() < self.TIMER_THRESHOLD:
-            raise Timeout()
+        self.nodes_left -= 1
+        if(self.nodes_left <= 0):
+            self.check_time()
 
         # exit condition 1 : leaf node
-        if(len(game.get_legal_moves()) == 0):
+        if(game.count_legal_moves() == 0):
             exit_score = self.score(game, self)
             if(exit_score == float('inf')):
                 return exit_score, game.get_player_location(self)
@@ -513,6 +1566,7 @@ class CustomPlayer:
 
         #exit condition 2 : max fixed depth reached
         if(depth == 0):
+           self.exact = False
            return self.score(game, self), game.get_player_location(self)
 
         score = float("inf")
@@ -520,7 +1574,12 @@ class CustomPlayer:
 
         legal_move = game.get_legal_moves()
         for m in legal_move:
-            new_score, notmove = self.minimax_max(game.forecast_move(m), depth - 1, not maximizing_player)
+            if(self.inplace):
+                game.apply_move(m)
+                new_score, notmove = self.minimax_max(game, depth - 1, not maximizing_player)
+                game.undo_move()
+            else:
+                new_score, notmove = self.minimax_max(game.forecast_move(m), depth - 1, not maximizing_player)
             if( (new_score < score) or (new_score == float('-inf'))):
                 score = new_score
                 move = m
@@ -562,23 +1621,93 @@ class CustomPlayer:
         if self.time_left() < self.TIMER_THRESHOLD:
             raise Timeout()
 
-        if(len(game.get_legal_moves()) == 0):
+        if(game.count_legal_moves() == 0):
             exit_score = self.score(game, self)
             if(exit_score == float('inf')):
                 return exit_score, game.get_player_location(self)
             else:
                 return exit_score, (-1, -1)
 
+        # the in-place search mutates the board, so it must not touch the
+        # caller's copy (a Timeout can interrupt it halfway down the tree)
+        if(self.inplace):
+            game = game.copy()
+
+        self.exact = True
+
         # TODO: finish this function!
+        if(not maximizing_player):
+            return self.minimax_min(game, depth, maximizing_player)
         return self.minimax_max(game, depth, maximizing_player)
 
+    def order_moves(self, game, legal_moves, depth, first=None):
+        """Return a copy of the legal moves in the order they should be
+        searched; the list of the board is shared and left as is.
+
+        Parameters
+        ----------
+        game : isolation.Board
+            The position being searched.
+
+        legal_moves : list<(int, int)>
+            The legal moves of the player to move.
+
+        depth : int
+            The remaining depth of the search at this node.
+
+        first : tuple(int, int) (optional)
+            A move to search before all the others (e.g., the best move
+            stored in the transposition table), if it is legal.
+
+        Returns
+        -------
+        list<(int, int)>
+            The legal moves, most promising first
+        """
+        front = []
+        if(first is not None and first in legal_moves):
+            front.append(first)
+        if('killer' in self.ordering):
+            for m in self.killers.get(self.root_depth - depth, ()):
+                if(m in legal_moves and m not in front):
+                    front.append(m)
+        rest = [m for m in legal_moves if m not in front]
+
+        history = self.history if 'history' in self.ordering else None
+        if('mobility' in self.ordering):
+            opp_moves = game.get_legal_moves(game.inactive_player)
+            opp_count = len(opp_moves)
+            if(history is not None):
+                rest.sort(key=lambda m: (-history.get(m, 0),
+                                         opp_count - (m in opp_moves),
+                                         -game.get_degree(m)))
+            else:
+                rest.sort(key=lambda m: (opp_count - (m in opp_moves),
+                                         -game.get_degree(m)))
+        elif(history is not None):
+            rest.sort(key=lambda m: -history.get(m, 0))
+        return front + rest
+
+    def record_cutoff(self, move, depth):
+        """Update the killer moves and the history table with a move that
+        caused a cutoff with the given remaining depth.
+        """
+        if('killer' in self.ordering):
+            killers = self.killers.setdefault(self.root_depth - depth, [])
+            if(move not in killers):
+                killers.insert(0, move)
+                del killers[2:]
+        if('history' in self.ordering):
+            self.history[move] = self.history.get(move, 0) + depth * depth
+
     def alphabeta_max(self, game, depth, alpha, beta, maximizing_player=True):
 
-        if self.time_left() < self.TIMER_THRESHOLD:
-            raise Timeout()
+        self.nodes_left -= 1
+        if(self.nodes_left <= 0):
+            self.check_time()
 
         # exit condition 1 : leaf node
-        if(len(game.get_legal_moves()) == 0):
+        if(game.count_legal_moves() == 0):
             exit_score = self.score(game, self)
             if(exit_score == float('inf')):
                 return exit_score, game.get_player_location(self)
@@ -587,30 +1716,79 @@ class CustomPlayer:
 
         #exit condition 2 : max fixed depth reached
         if(depth == 0):
+            self.exact = False
             return self.score(game, self), game.get_player_location(self)
 
         score = float("-inf")
         move = game.get_player_location(self)
 
         legal_move = game.get_legal_moves()
+        tt_move = None
+        if(self.tt is not None):
+            key = game.get_hash()
+            tt_score, tt_move = self.tt.probe(key, depth, alpha, beta)
+            if(tt_score is not None):
+                if(not math.isinf(tt_score)):
+                    self.exact = False
+                return tt_score, tt_move
+            window = alpha, beta
+        first = tt_move
+        if(self.pv_reuse):
+            # search the principal variation of the previous iteration first,
+            # for as long as the current path follows it from the root
+            ply = self.root_depth - depth
+            if(self.follow_pv):
+                if(ply < len(self.pv) and self.pv[ply] in legal_move):
+                    first = self.pv[ply]
+                else:
+                    self.follow_pv = False
+        if(self.ordering or first is not None):
+            legal_move = self.order_moves(game, legal_move, depth, first)
+
         for m in legal_move:
-            new_score, notmove = self.alphabeta_min(game.forecast_move(m), depth - 1, alpha, beta, not maximizing_player)
+            if(self.pv_reuse):
+                self.pv_table[ply + 1] = []
+            if(self.inplace):
+                game.apply_move(m)
+                child = game
+            else:
+                child = game.forecast_move(m)
+            if(self.method == 'pvs' and m != legal_move[0]):
+                # null window test: can the move improve on the best score?
+                new_score, notmove = self.alphabeta_min(child, depth - 1, alpha, math.nextafter(alpha, float('inf')), not maximizing_player)
+                if(alpha < new_score < beta):
+                    if(self.pv_reuse):
+                        self.pv_table[ply + 1] = []
+                    new_score, notmove = self.alphabeta_min(child, depth - 1, alpha, beta, not maximizing_player)
+            else:
+                new_score, notmove = self.alphabeta_min(child, depth - 1, alpha, beta, not maximizing_player)
+            if(self.inplace):
+                game.undo_move()
             if( (new_score > score) or (new_score == float('inf'))):
                 score = new_score
                 move = m
+                if(self.pv_reuse):
+                    self.pv_table[ply] = [m] + self.pv_table[ply + 1]
+            if(self.pv_reuse):
+                self.follow_pv = False
             if(score >= beta):
-                return score, move
+                if(self.ordering):
+                    self.record_cutoff(m, depth)
+                break
             alpha = max(alpha, score)
 
+        if(self.tt is not None):
+            self.tt.store(key, depth, window[0], window[1], score, move)
         return score, move
 
     def alphabeta_min(self, game, depth, alpha, beta, maximizing_player=True):
 
-        if self.time_left() < self.TIMER_THRESHOLD:
-            raise Timeout()
+        self.nodes_left -= 1
+        if(self.nodes_left <= 0):
+            self.check_time()
 
         # exit condition 1 : leaf node
-        if(len(game.get_legal_moves()) == 0):
+        if(game.count_legal_moves() == 0):
             exit_score = self.score(game, self)
             if(exit_score == float('inf')):
                 return exit_score, game.get_player_location(self)
@@ -619,24 +1797,96 @@ class CustomPlayer:
 
         #exit condition 2 : max fixed depth reached
         if(depth == 0):
+            self.exact = False
             return self.score(game, self), game.get_player_location(self)
 
         score = float("inf")
         move = game.get_player_location(self)
 
         legal_move = game.get_legal_moves()
+        tt_move = None
+        if(self.tt is not None):
+            key = game.get_hash() ^ TranspositionTable.MIN_NODE
+            tt_score, tt_move = self.tt.probe(key, depth, alpha, beta)
+            if(tt_score is not None):
+                if(not math.isinf(tt_score)):
+                    self.exact = False
+                return tt_score, tt_move
+            window = alpha, beta
+        first = tt_move
+        if(self.pv_reuse):
+            # search the principal variation of the previous iteration first,
+            # for as long as the current path follows it from the root
+            ply = self.root_depth - depth
+            if(self.follow_pv):
+                if(ply < len(self.pv) and self.pv[ply] in legal_move):
+                    first = self.pv[ply]
+                else:
+                    self.follow_pv = False
+        if(self.ordering or first is not None):
+            legal_move = self.order_moves(game, legal_move, depth, first)
+
         for m in legal_move:
-            new_score, notmove = self.alphabeta_max(game.forecast_move(m), depth - 1, alpha, beta, not maximizing_player)
+            if(self.pv_reuse):
+                self.pv_table[ply + 1] = []
+            if(self.inplace):
+                game.apply_move(m)
+                child = game
+            else:
+                child = game.forecast_move(m)
+            if(self.method == 'pvs' and m != legal_move[0]):
+                # null window test: can the move improve on the best score?
+                new_score, notmove = self.alphabeta_max(child, depth - 1, math.nextafter(beta, float('-inf')), beta, not maximizing_player)
+                if(alpha < new_score < beta):
+                    if(self.pv_reuse):
+                        self.pv_table[ply + 1] = []
+                    new_score, notmove = self.alphabeta_max(child, depth - 1, alpha, beta, not maximizing_player)
+            else:
+                new_score, notmove = self.alphabeta_max(child, depth - 1, alpha, beta, not maximizing_player)
+            if(self.inplace):
+                game.undo_move()
             if( (new_score < score) or (new_score == float('-inf'))):
                 score = new_score
                 move = m
+                if(self.pv_reuse):
+                    self.pv_table[ply] = [m] + self.pv_table[ply + 1]
+            if(self.pv_reuse):
+                self.follow_pv = False
             if(score <= alpha):
-                return score, move
+                if(self.ordering):
+                    self.record_cutoff(m, depth)
+                break
             beta = min(beta, score)
 
+        if(self.tt is not None):
+            self.tt.store(key, depth, window[0], window[1], score, move)
         return score, move
 
-    def alphabeta(self, game, depth, alpha=float("-inf"), beta=float("inf"), maximizing_player=True):
+    def aspiration_search(self, game, depth, guess=None):
+        """Run alphabeta() with a window of half-width `self.aspiration`
+        centred on a guess of the score (usually the score of the previous
+        iteration), and again with the full window if the score falls
+        outside.
+
+        Returns
+        -------
+        float
+            The score of the position
+
+        tuple(int, int)
+            The best move; (-1, -1) for no legal moves
+        """
+        if(self.aspiration is None or guess is None or math.isinf(guess)):
+            return self.alphabeta(game, depth)
+        alpha = guess - self.aspiration
+        beta = guess + self.aspiration
+        score, move = self.alphabeta(game, depth, alpha, beta)
+        if(alpha < score < beta):
+            return score, move
+        return self.alphabeta(game, depth)
+
+    def alphabeta(self, game, depth, alpha=float("-inf"), beta=float("inf"), maximizing_player=True,
+                  return_pv=False):
         """Implement minimax search with alpha-beta pruning as described in the
         lectures.
 
@@ -660,6 +1910,10 @@ class CustomPlayer:
             Flag indicating whether the current search depth corresponds to a
             maximizing layer (True) or a minimizing layer (False)
 
+        return_pv : bool (optional)
+            Flag indicating whether to also return the principal variation
+            found by the search (requires `pv_reuse=True`)
+
         Returns
         -------
         float
@@ -668,6 +1922,10 @@ class CustomPlayer:
         tuple(int, int)
             The best move for the current branch; (-1, -1) for no legal moves
 
+        list<(int, int)>
+            The principal variation, starting with the best move; only
+            returned if `return_pv` is True
+
         Notes
         -----
             (1) You MUST use the `self.score()` method for board evaluation
@@ -678,11 +1936,146 @@ class CustomPlayer:
         if self.time_left() < self.TIMER_THRESHOLD:
             raise Timeout()
 
-        if(len(game.get_legal_moves()) == 0):
+        if(game.count_legal_moves() == 0):
             exit_score = self.score(game, self)
             if(exit_score == float('inf')):
-                return exit_score, game.get_player_location(self)
+                result = exit_score, game.get_player_location(self)
             else:
-                return exit_score, (-1, -1)
+                result = exit_score, (-1, -1)
+            return result + ([],) if return_pv else result
+
+        if(return_pv and not self.pv_reuse):
+            raise ValueError("The principal variation is only recorded with pv_reuse=True.")
+
+        if(self.inplace):
+            game = game.copy()
 
-        return self.alphabeta_max(game, depth, alpha, beta, maximizing_player)
+        self.root_depth = depth
+        self.exact = True
+        if(self.pv_reuse):
+            self.pv_table = {0: []}
+            self.follow_pv = True
+
+        if(maximizing_player):
+            score, move = self.alphabeta_max(game, depth, alpha, beta, maximizing_player)
+        else:
+            score, move = self.alphabeta_min(game, depth, alpha, beta, maximizing_player)
+
+        if(self.pv_reuse):
+            # a hit of the root in the transposition table records no line:
+            # keep the previous one if it starts with the move found
+            if(self.pv_table[0]):
+                self.pv = self.pv_table[0]
+            elif(not self.pv or self.pv[0] != move):
+                self.pv = [move] if move in game.get_legal_moves() else []
+        if(return_pv):
+            return score, move, self.pv
+        return score, move
+
+
+# the player of each worker process of the parallel search
+parallel_worker = None
+
+def init_parallel_worker(config):
+    """Create the player used by a worker process of the parallel search."""
+    global parallel_worker
+    parallel_worker = CustomPlayer(**config)
+
+def parallel_worker_search(board_cls, state, own_index, root_moves, deadline):
+    """Run the iterative deepening search of a subset of the root moves in a
+    worker process of the parallel search.
+
+    Parameters
+    ----------
+    board_cls : class
+        The class of the board, used to decode the game state
+
+    state : int
+        The game state encoded by `to_int()`, with the searching player to
+        move
+
+    own_index : int
+        0 if the searching player is the first player of the game, else 1
+
+    root_moves : list<(int, int)>
+        The legal moves searched by this worker
+
+    deadline : float
+        The `timeit.default_timer()` value at which the search stops
+
+    Returns
+    -------
+    list<(float, (int, int))>
+        The best score and move among the root moves for each completed
+        depth, starting at depth 1
+    """
+    player = parallel_worker
+    if(own_index == 0):
+        game = board_cls.from_int(state, player, "opponent")
+    else:
+        game = board_cls.from_int(state, "opponent", player)
+    if(player.q1 is None):
+        player.q1, player.q2, player.q3, player.q4, player.b1, player.b2, player.b3, player.b4 = \
+            player.create_quarter(game.width, game.height)
+    player.start_timer(lambda: 1000. * (deadline - timeit.default_timer()))
+    if(player.tt is not None):
+        player.tt.clear()
+    player.killers = {}
+    player.history = {}
+    player.pv = []
+
+    results = []
+    try:
+        for depth in range(1, player.max_depth(game) + 1):
+            best_score, best_move = None, root_moves[0]
+            alpha = float('-inf')
+            for m in root_moves:
+                child = game.forecast_move(m)
+                if(player.method == 'minimax'):
+                    score, _ = player.minimax(child, depth - 1, False)
+                else:
+                    score, _ = player.alphabeta(child, depth - 1, alpha, float('inf'), False)
+                if(best_score is None or score > best_score):
+                    best_score, best_move = score, m
+                alpha = max(alpha, score)
+            results.append((best_score, best_move))
+            if(math.isinf(best_score)):
+                break
+    except Timeout:
+        pass
+    return results
+
+def parallel_worker_mcts(board_cls, state, own_index, deadline):
+    """Run a Monte Carlo search in a worker process of the parallel search.
+
+    Parameters
+    ----------
+    board_cls : class
+        The class of the board, used to decode the game state
+
+    state : int
+        The game state encoded by `to_int()`, with the searching player to
+        move
+
+    own_index : int
+        0 if the searching player is the first player of the game, else 1
+
+    deadline : float
+        The `timeit.default_timer()` value at which the search stops
+
+    Returns
+    -------
+    int
+        The number of playouts
+
+    list<((int, int), int)>
+        The visit count of each legal move searched
+    """
+    player = parallel_worker
+    if(own_index == 0):
+        game = board_cls.from_int(state, player, "opponent")
+    else:
+        game = board_cls.from_int(state, "opponent", player)
+    player.start_timer(lambda: 1000. * (deadline - timeit.default_timer()))
+    root = player.mcts(game)
+    return player.playouts, [(child.move, child.visits) for child in root.children]
@@ -0,0 +1,199 @@
+"""
+This file contains the `BoardBatch` class, which stores many Isolation
+positions of the same size as NumPy arrays so that legal moves, mobility and
+terminal status can be computed for all of them in a single vectorised call.
+
+This module requires NumPy, which is not needed by the rest of the package:
+import it explicitly with `from isolation.batch import BoardBatch`.
+"""
+
+import numpy as np
+
+from .geometry import get_geometry
+
+
+class BoardBatch(object):
+    """
+    A batch of N Isolation positions on boards of the same size, following
+    the rules of `isolation.Board`. Players are identified by their index:
+    0 for the first player and 1 for the second player.
+
+    Parameters
+    ----------
+    size : int
+        The number of positions in the batch; every position starts as an
+        empty board with player 0 to move.
+
+    width : int (optional)
+        The number of columns of each board.
+
+    height : int (optional)
+        The number of rows of each board.
+
+    Attributes
+    ----------
+    blocked : numpy.ndarray<bool> (N, width * height)
+        The blocked cells of each position, indexed by `row * width + col`.
+
+    locations : numpy.ndarray<int> (N, 2)
+        The cell index of each player in each position (-1 if not moved).
+
+    active : numpy.ndarray<int> (N,)
+        The index of the player to move in each position.
+
+    move_count : numpy.ndarray<int> (N,)
+        The number of moves applied to each position.
+    """
+
+    def __init__(self, size, width=7, height=7):
+        self.width = width
+        self.height = height
+        self.geometry = get_geometry(width, height)
+        num_cells = width * height
+        self.blocked = np.zeros((size, num_cells), dtype=bool)
+        self.locations = np.full((size, 2), -1, dtype=np.int64)
+        self.active = np.zeros(size, dtype=np.int64)
+        self.move_count = np.zeros(size, dtype=np.int64)
+
+        # row `cell` of the adjacency matrix marks the knight destinations of
+        # the cell; the extra last row is used by players that have not moved
+        # yet, who may move to any cell on the board
+        self.__adjacency__ = np.zeros((num_cells + 1, num_cells), dtype=bool)
+        for cell, neighbours in enumerate(self.geometry.neighbours):
+            self.__adjacency__[cell, list(neighbours)] = True
+        self.__adjacency__[num_cells, :] = True
+
+    @classmethod
+    def from_boards(cls, boards):
+        """
+        Build a batch from a sequence of `isolation.Board` instances of the
+        same size. The first player registered on each board has index 0.
+        """
+        width, height = boards[0].width, boards[0].height
+        batch = cls(len(boards), width, height)
+        for idx, board in enumerate(boards):
+            if (board.width, board.height) != (width, height):
+                raise ValueError("All the boards in a batch must have the same size.")
+            batch.blocked[idx, board.__blocked_cells__()] = True
+            batch.locations[idx] = board.__cell_1__, board.__cell_2__
+            batch.active[idx] = 0 if board.active_player == board.__player_1__ else 1
+            batch.move_count[idx] = board.move_count
+        return batch
+
+    def __len__(self):
+        return len(self.active)
+
+    def copy(self):
+        """ Return a copy of the batch. """
+        new_batch = BoardBatch.__new__(BoardBatch)
+        new_batch.width = self.width
+        new_batch.height = self.height
+        new_batch.geometry = self.geometry
+        new_batch.blocked = self.blocked.copy()
+        new_batch.locations = self.locations.copy()
+        new_batch.active = self.active.copy()
+        new_batch.move_count = self.move_count.copy()
+        new_batch.__adjacency__ = self.__adjacency__
+        return new_batch
+
+    def legal_moves_mask(self, player=None):
+        """
+        Return the legal moves of a player in every position.
+
+        Parameters
+        ----------
+        player : int or numpy.ndarray<int> (optional)
+            The index of the player (0 or 1), or one index per position. If
+            None, return the legal moves of the player to move.
+
+        Returns
+        ----------
+        numpy.ndarray<bool> (N, width * height)
+            Element [i, cell] is True if the player can move to the cell in
+            position i.
+        """
+        if player is None:
+            player = self.active
+        player = np.broadcast_to(player, self.active.shape)
+        cells = self.locations[np.arange(len(self)), player]
+        cells = np.where(cells < 0, self.width * self.height, cells)
+        return self.__adjacency__[cells] & ~self.blocked
+
+    def mobility(self, player=None):
+        """
+        Return the number of legal moves of a player in every position (see
+        `legal_moves_mask()` for the player argument).
+        """
+        return self.legal_moves_mask(player).sum(axis=1)
+
+    def is_terminal(self):
+        """ Return a boolean array marking the positions where the game is over. """
+        return ~self.legal_moves_mask().any(axis=1)
+
+    def utility(self, player):
+        """
+        Return the utility of every position from the perspective of a player
+        (see `isolation.Board.utility()`): +inf if the player has won, -inf if
+        the player has lost, and 0 otherwise.
+        """
+        player = np.broadcast_to(player, self.active.shape)
+        terminal = self.is_terminal()
+        return np.where(terminal, np.where(player == self.active, -np.inf, np.inf), 0.)
+
+    def get_legal_moves(self, index):
+        """
+        Return the legal moves of the player to move in one position of the
+        batch, as a list of (row, column) pairs in the same order as
+        `isolation.Board.get_legal_moves()`.
+        """
+        cell = self.locations[index, self.active[index]]
+        blocked = self.blocked[index]
+        order = self.geometry.column_order if cell < 0 else self.geometry.neighbours[cell]
+        return [self.geometry.cells[n] for n in order if not blocked[n]]
+
+    def apply_moves(self, cells):
+        """
+        Move the player to move in each position to the given cell.
+
+        Parameters
+        ----------
+        cells : numpy.ndarray<int> (N,)
+            The cell index (`row * width + col`) of the move applied to each
+            position; positions with a negative index are left unchanged.
+
+        Returns
+        ----------
+        None
+        """
+        cells = np.asarray(cells)
+        idx = np.nonzero(cells >= 0)[0]
+        cells = cells[idx]
+        self.blocked[idx, cells] = True
+        self.locations[idx, self.active[idx]] = cells
+        self.active[idx] ^= 1
+        self.move_count[idx] += 1
+
+    def random_playout(self, rng=None):
+        """
+        Play uniformly random moves in every position until all the games are
+        over, modifying the batch in place.
+
+        Parameters
+        ----------
+        rng : numpy.random.Generator (optional)
+            The random number generator used to select the moves.
+
+        Returns
+        ----------
+        numpy.ndarray<int> (N,)
+            The index of the winning player of each game.
+        """
+        if rng is None:
+            rng = np.random.default_rng()
+        while True:
+            legal = self.legal_moves_mask()
+            live = legal.any(axis=1)
+            if not live.any():
+                return self.active ^ 1
+            choice = np.where(legal, rng.random(legal.shape), -1.).argmax(axis=1)
+            self.apply_moves(np.where(live, choice, -1))
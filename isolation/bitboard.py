@@ -0,0 +1,206 @@
+"""
+This file contains the `BitBoard` class, an alternative backend for the
+Isolation `Board` that encodes the game state in Python integers instead of
+a grid of cells, so that copying a board during search only copies a handful
+of ints.
+"""
+
+from .isolation import Board
+from .geometry import get_geometry
+
+
+class BitBoard(Board):
+    """
+    Implement the rules of `isolation.Board` on a bitboard. Cell (row, col)
+    is mapped to the bit `row * width + col`; the blocked cells are the set
+    bits of a single integer, and the location of each player is stored as
+    the index of its cell (-1 before the player has moved).
+
+    The public API is the same as `isolation.Board`, so the two classes can
+    be used interchangeably by the players. Unlike `Board`, a bitboard does
+    not record which player blocked each cell.
+
+    Parameters
+    ----------
+    player_1 : object
+        An object with a get_move() function. This is the only function
+        directly called by the Board class for each player.
+
+    player_2 : object
+        An object with a get_move() function. This is the only function
+        directly called by the Board class for each player.
+
+    width : int (optional)
+        The number of columns that the board should have.
+
+    height : int (optional)
+        The number of rows that the board should have.
+    """
+
+    __slots__ = ('__blocked__',)
+
+    def __init__(self, player_1, player_2, width=7, height=7):
+        self.width = width
+        self.height = height
+        self.move_count = 0
+        self.__player_1__ = player_1
+        self.__player_2__ = player_2
+        self.__active_player__ = player_1
+        self.__inactive_player__ = player_2
+        self.__geometry__ = get_geometry(width, height)
+        self.__blocked__ = 0
+        self.__cell_1__ = -1
+        self.__cell_2__ = -1
+        self.__history__ = []
+        self.__zobrist__ = 0
+        self.__moves_1__ = None
+        self.__moves_2__ = None
+        self.__blanks__ = None
+        self.__region_1__ = None
+        self.__region_2__ = None
+        self.__region_history__ = []
+
+    def copy(self):
+        """ Return a copy of the current board. """
+        new_board = BitBoard.__new__(BitBoard)
+        new_board.width = self.width
+        new_board.height = self.height
+        new_board.move_count = self.move_count
+        new_board.__player_1__ = self.__player_1__
+        new_board.__player_2__ = self.__player_2__
+        new_board.__active_player__ = self.__active_player__
+        new_board.__inactive_player__ = self.__inactive_player__
+        new_board.__geometry__ = self.__geometry__
+        new_board.__blocked__ = self.__blocked__
+        new_board.__cell_1__ = self.__cell_1__
+        new_board.__cell_2__ = self.__cell_2__
+        new_board.__history__ = self.__history__[:]
+        new_board.__zobrist__ = self.__zobrist__
+        new_board.__moves_1__ = self.__moves_1__
+        new_board.__moves_2__ = self.__moves_2__
+        new_board.__blanks__ = self.__blanks__
+        new_board.__region_1__ = self.__region_1__
+        new_board.__region_2__ = self.__region_2__
+        new_board.__region_history__ = self.__region_history__[:]
+        return new_board
+
+    @property
+    def __board_state__(self):
+        """
+        The grid as a list of rows of BLANK or player symbols, like
+        `Board.__board_state__`. A bitboard does not record which player
+        blocked each cell, so the cell of player 2 is marked 2 and every
+        other blocked cell 1.
+        """
+        width, blocked = self.width, self.__blocked__
+        state = [[blocked >> (r * width + c) & 1 for c in range(width)]
+                 for r in range(self.height)]
+        if self.__cell_2__ >= 0:
+            state[self.__cell_2__ // width][self.__cell_2__ % width] = 2
+        return state
+
+    @__board_state__.setter
+    def __board_state__(self, board_state):
+        blocked = 0
+        for cell, value in enumerate(value for row in board_state for value in row):
+            if value != Board.BLANK:
+                blocked |= 1 << cell
+        self.__blocked__ = blocked
+        self.__clear_cache__()
+        self.__forget_regions__()
+        self.__rehash__()
+
+    def move_is_legal(self, move):
+        """
+        Test whether a move is legal in the current game state.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+
+        Returns
+        ----------
+        bool
+            Returns True if the move is legal, False otherwise
+        """
+        row, col = move
+        return 0 <= row < self.height and \
+               0 <= col < self.width and \
+               not self.__blocked__ >> (row * self.width + col) & 1
+
+    def count_legal_moves(self, player=None):
+        """
+        Return the number of legal moves for the specified player, counting
+        the open knight destinations of its cell on the bitmask without
+        generating the moves.
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If None,
+            return the number of legal moves for the active player.
+
+        Returns
+        ----------
+        int
+            The number of legal moves for the player.
+        """
+        if player is None:
+            player = self.active_player
+        cell = self.__player_cell__(player)
+        if cell < 0:
+            return self.width * self.height - bin(self.__blocked__).count("1")
+        return bin(self.__geometry__.masks[cell] & ~self.__blocked__).count("1")
+
+    def get_degree(self, move):
+        """
+        Return the number of open cells a knight could move to from the given
+        location, whether or not the location itself is open.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) on the board.
+
+        Returns
+        ----------
+        int
+            The number of blank cells one knight move away from the location.
+        """
+        cell = move[0] * self.width + move[1]
+        return bin(self.__geometry__.masks[cell] & ~self.__blocked__).count("1")
+
+    def __cell_moves__(self, cell):
+        """ Generate the list of open knight destinations from a cell index. """
+        blocked = self.__blocked__
+        moves = self.__geometry__.cells
+        return [moves[n] for n in self.__geometry__.neighbours[cell] if not blocked >> n & 1]
+
+    def __find_blank_spaces__(self):
+        """ Generate the list of blank cells in column-major order. """
+        blocked = self.__blocked__
+        moves = self.__geometry__.cells
+        return [moves[n] for n in self.__geometry__.column_order if not blocked >> n & 1]
+
+    def __occupy__(self, cell, symbol):
+        """ Block a cell with the symbol of the player moving onto it. """
+        self.__blocked__ |= 1 << cell
+
+    def __vacate__(self, cell):
+        """ Reopen a cell blocked by the move being undone. """
+        self.__blocked__ &= ~(1 << cell)
+
+    def __permute_cells__(self, symmetry):
+        """ Move the blocked cells through a permutation of the cells. """
+        self.__blocked__ = sum(1 << symmetry[cell] for cell in self.__blocked_cells__())
+
+    def __blocked_cells__(self):
+        """ Return the list of the indices of the blocked cells. """
+        blocked = self.__blocked__
+        return [cell for cell in range(self.width * self.height) if blocked >> cell & 1]
+
+    def __open_mask__(self):
+        """ Return the bitmask of the blank cells. """
+        return ~self.__blocked__ & ((1 << self.width * self.height) - 1)
@@ -0,0 +1,144 @@
+"""
+This file contains the `OpeningBook` class, which looks up precomputed moves
+for the first plies of a game in a binary file read through a memory map,
+and `write_book()`, which writes such a file.
+
+A book file starts with a header holding a magic string, the width and the
+height of the board, the size of the keys, the number of plies covered and
+the number of entries. The entries follow, sorted by key: each one is the
+`to_int()` encoding of a position in canonical form (see
+`Board.canonical()`), written big endian on a fixed number of bytes so that
+the byte order of the keys is their numeric order, and the cell index of
+the move to play on the canonical board.
+"""
+
+import mmap
+import struct
+
+MAGIC = b"ISOB"
+HEADER = struct.Struct("<4sBBBBI")  # magic, width, height, key size, plies, count
+
+
+def key_size(width, height):
+    """
+    Return the number of bytes of the key of a position on a board of the
+    given size, i.e. the size of the largest `to_int()` encoding.
+    """
+    bits = (width * height).bit_length()
+    return (16 + 3 * bits + 1 + width * height + 7) // 8
+
+
+def position_key(board):
+    """
+    Return the book key of a position and the index of the transform that
+    maps it onto its canonical form.
+    """
+    canonical, transform = board.canonical()
+    return canonical.to_int().to_bytes(key_size(board.width, board.height), "big"), transform
+
+
+def write_book(path, entries, width, height, plies):
+    """
+    Write an opening book file.
+
+    Parameters
+    ----------
+    path : str
+        The path of the file to write.
+
+    entries : dict<bytes, int>
+        The cell index of the move to play on each canonical position, keyed
+        by `position_key()`.
+
+    width : int
+        The number of columns of the board.
+
+    height : int
+        The number of rows of the board.
+
+    plies : int
+        The number of plies covered by the book: every position reached
+        after fewer moves is expected to be in the book.
+    """
+    size = key_size(width, height)
+    if width * height > 256:
+        raise ValueError("A book move must fit in one byte.")
+    with open(path, "wb") as book_file:
+        book_file.write(HEADER.pack(MAGIC, width, height, size, plies, len(entries)))
+        for key in sorted(entries):
+            if len(key) != size:
+                raise ValueError("Book keys of a {}x{} board have {} bytes.".format(
+                    width, height, size))
+            book_file.write(key + bytes((entries[key],)))
+
+
+class OpeningBook(object):
+    """
+    Read-only view of an opening book file. The file is memory-mapped and
+    only its header is decoded when the book is opened; each lookup is a
+    binary search over the sorted entries.
+
+    Parameters
+    ----------
+    path : str
+        The path of a file written by `write_book()`.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as book_file:
+            self.data = mmap.mmap(book_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.width, self.height, self.key_size, self.plies, self.count = \
+            HEADER.unpack_from(self.data)
+        self.record_size = self.key_size + 1
+        if magic != MAGIC or len(self.data) != HEADER.size + self.count * self.record_size:
+            self.data.close()
+            raise ValueError("{} is not an opening book file.".format(path))
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        """ Unmap the book file. """
+        self.data.close()
+
+    def covers(self, board):
+        """
+        Test whether the book is meant to hold the position of a board, i.e.
+        whether the board has the size of the book and fewer moves played
+        than the plies covered by the book.
+        """
+        return (board.width == self.width and board.height == self.height and
+                board.move_count < self.plies)
+
+    def lookup(self, board):
+        """
+        Return the book move for the player to move on a board, or None if
+        the position is not in the book.
+
+        Parameters
+        ----------
+        board : `isolation.Board`
+            The current game state.
+
+        Returns
+        ----------
+        (int, int)
+            The coordinate pair (row, column) of the move to play.
+        """
+        if not self.covers(board):
+            return None
+        key, transform = position_key(board)
+        data, size = self.data, self.key_size
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            offset = HEADER.size + middle * self.record_size
+            entry = data[offset:offset + size]
+            if entry < key:
+                low = middle + 1
+            elif entry > key:
+                high = middle
+            else:
+                move = board.__geometry__.cells[data[offset + size]]
+                return board.untransform_move(move, transform)
+        return None
@@ -0,0 +1,144 @@
+"""
+This file contains the `Geometry` class, which precomputes the knight-move
+adjacency of every cell for a given board size. The tables only depend on
+the width and height of the board, so they are built once per size and
+shared by every board instance through `get_geometry()`.
+"""
+
+import random
+
+KNIGHT_DIRECTIONS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
+                     (1, -2),  (1, 2), (2, -1),  (2, 1)]
+
+# The eight symmetries of the square, as functions of the (row, col) pair of
+# a cell and of the index of the last row (m) and last column (n) of the
+# board: identity, rotations by 90, 180 and 270 degrees clockwise, mirror
+# left-right, mirror top-bottom, transpose and anti-transpose. Transforms 1,
+# 3, 6 and 7 swap rows and columns, so they only apply to square boards.
+TRANSFORMS = [lambda r, c, m, n: (r, c),
+              lambda r, c, m, n: (c, m - r),
+              lambda r, c, m, n: (m - r, n - c),
+              lambda r, c, m, n: (n - c, r),
+              lambda r, c, m, n: (r, n - c),
+              lambda r, c, m, n: (m - r, c),
+              lambda r, c, m, n: (c, r),
+              lambda r, c, m, n: (n - c, m - r)]
+
+# INVERSE_TRANSFORMS[t] undoes transform t
+INVERSE_TRANSFORMS = [0, 3, 2, 1, 4, 5, 6, 7]
+
+
+class Geometry(object):
+    """
+    Knight-move adjacency tables for a board of the given size. Cell
+    (row, col) has the index `row * width + col`.
+
+    Attributes
+    ----------
+    cells : list<(int, int)>
+        The coordinate pair (row, column) of each cell index.
+
+    column_order : list<int>
+        The cell indices sorted column by column, which is the order in which
+        `Board.get_blank_spaces()` lists the open cells.
+
+    moves : list<list<tuple<(int, int)>>>
+        `moves[row][col]` is the tuple of in-bounds knight destinations from
+        (row, col), listed in the order of `KNIGHT_DIRECTIONS`.
+
+    neighbours : list<tuple<int>>
+        `neighbours[cell]` is the tuple of in-bounds knight destinations from
+        the cell, as cell indices in the order of `KNIGHT_DIRECTIONS`.
+
+    masks : list<int>
+        `masks[cell]` is the bitmask of the in-bounds knight destinations
+        from the cell.
+
+    degrees : bytearray
+        `degrees[cell]` is the number of in-bounds knight destinations from
+        the cell, i.e. its number of open neighbours on an empty board.
+
+    colours : (int, int)
+        The bitmasks of the cells where row + col is even and odd,
+        respectively. A knight always moves to a cell of the other colour.
+
+    zobrist_blocked : list<int>
+        Random 64-bit key of each cell, XORed into the Zobrist hash of a
+        position while the cell is blocked.
+
+    zobrist_players : (list<int>, list<int>)
+        Random 64-bit keys of each cell for the location of player 1 and of
+        player 2, respectively.
+
+    zobrist_side : int
+        Random 64-bit key XORed into the hash when player 2 is to move.
+
+    symmetries : list<list<int>>
+        `symmetries[t][cell]` is the image of the cell under transform `t`
+        of `TRANSFORMS`, or `symmetries[t]` is None if the transform does not
+        map the board onto itself (i.e., it swaps rows and columns on a
+        board that is not square).
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.cells = [(r, c) for r in range(height) for c in range(width)]
+        self.column_order = [r * width + c for c in range(width) for r in range(height)]
+        self.moves = [[tuple((r + dr, c + dc) for dr, dc in KNIGHT_DIRECTIONS
+                             if 0 <= r + dr < height and 0 <= c + dc < width)
+                       for c in range(width)] for r in range(height)]
+        self.neighbours = [tuple(r * width + c for r, c in self.moves[row][col])
+                           for row, col in self.cells]
+        self.masks = [sum(1 << n for n in neighbours) for neighbours in self.neighbours]
+        self.degrees = bytearray(len(neighbours) for neighbours in self.neighbours)
+        even = sum(1 << r * width + c for r, c in self.cells if (r + c) % 2 == 0)
+        self.colours = (even, ((1 << width * height) - 1) ^ even)
+
+        # the keys are seeded with the board size so that hashes are stable
+        # across runs and processes
+        rng = random.Random("zobrist-%dx%d" % (width, height))
+        self.zobrist_blocked = [rng.getrandbits(64) for _ in self.cells]
+        self.zobrist_players = ([rng.getrandbits(64) for _ in self.cells],
+                                [rng.getrandbits(64) for _ in self.cells])
+        self.zobrist_side = rng.getrandbits(64)
+
+        self.symmetries = []
+        for transform in TRANSFORMS:
+            images = [transform(r, c, height - 1, width - 1) for r, c in self.cells]
+            if all(0 <= r < height and 0 <= c < width for r, c in images):
+                self.symmetries.append([r * width + c for r, c in images])
+            else:
+                self.symmetries.append(None)
+
+    def reachable(self, cell, region):
+        """
+        Return the bitmask of the cells of a region that can be reached from
+        a cell index through knight moves within the region (flood fill).
+        """
+        masks = self.masks
+        reached = 0
+        frontier = masks[cell] & region
+        while frontier:
+            reached |= frontier
+            step = 0
+            while frontier:
+                low = frontier & -frontier
+                step |= masks[low.bit_length() - 1]
+                frontier ^= low
+            frontier = step & region & ~reached
+        return reached
+
+
+_geometries = {}
+
+
+def get_geometry(width, height):
+    """
+    Return the shared `Geometry` instance for a board of the given size,
+    building it on first use.
+    """
+    geometry = _geometries.get((width, height))
+    if geometry is None:
+        geometry = _geometries[(width, height)] = Geometry(width, height)
+    return geometry
@@ -10,9 +10,8 @@ be available to project reviewers.
 
 import timeit
 
-from copy import deepcopy
-from copy import copy
-
+from .geometry import get_geometry
+from .geometry import INVERSE_TRANSFORMS
 
 TIME_LIMIT_MILLIS = 200
 
@@ -41,6 +40,21 @@ class Board(object):
     BLANK = 0
     NOT_MOVED = None
 
+    # The grid is a flat bytearray indexed by `row * width + col` holding
+    # BLANK or the symbol (1 or 2) of the player that blocked the cell, and
+    # each player location is stored as a cell index (-1 if not moved). The
+    # degree map holds the number of open knight neighbours of every cell.
+    # The legal moves of each player and the blank spaces are computed on
+    # demand and cached until the next move is applied or undone. The open
+    # cells are also kept as a bitmask, from which the region reachable by
+    # each player is flood filled on demand; the regions are kept across a
+    # move when it cannot change them, and restored by undo_move().
+    __slots__ = ('width', 'height', 'move_count', '__player_1__', '__player_2__',
+                 '__active_player__', '__inactive_player__', '__geometry__',
+                 '__cells__', '__degree__', '__cell_1__', '__cell_2__', '__history__',
+                 '__zobrist__', '__moves_1__', '__moves_2__', '__blanks__', '__open__',
+                 '__region_1__', '__region_2__', '__region_history__')
+
     def __init__(self, player_1, player_2, width=7, height=7):
         self.width = width
         self.height = height
@@ -49,9 +63,20 @@ class Board(object):
         self.__player_2__ = player_2
         self.__active_player__ = player_1
         self.__inactive_player__ = player_2
-        self.__board_state__ = [[Board.BLANK for i in range(width)] for j in range(height)]
-        self.__last_player_move__ = {player_1: Board.NOT_MOVED, player_2: Board.NOT_MOVED}
-        self.__player_symbols__ = {Board.BLANK: Board.BLANK, player_1: 1, player_2: 2}
+        self.__geometry__ = get_geometry(width, height)
+        self.__cells__ = bytearray(width * height)
+        self.__degree__ = self.__geometry__.degrees[:]
+        self.__open__ = (1 << width * height) - 1
+        self.__cell_1__ = -1
+        self.__cell_2__ = -1
+        self.__history__ = []
+        self.__zobrist__ = 0
+        self.__moves_1__ = None
+        self.__moves_2__ = None
+        self.__blanks__ = None
+        self.__region_1__ = None
+        self.__region_2__ = None
+        self.__region_history__ = []
 
     @property
     def active_player(self):
@@ -69,6 +94,59 @@ class Board(object):
         """
         return self.__inactive_player__
 
+    @property
+    def __board_state__(self):
+        """
+        The grid as a list of rows, where each cell holds BLANK or the symbol
+        of the player that blocked it. Kept for compatibility with code that
+        copies the state of the board directly.
+        """
+        width = self.width
+        return [list(self.__cells__[r * width:(r + 1) * width]) for r in range(self.height)]
+
+    @__board_state__.setter
+    def __board_state__(self, board_state):
+        self.__cells__ = bytearray().join(bytearray(row) for row in board_state)
+        self.__degree__ = self.__geometry__.degrees[:]
+        self.__open__ = (1 << self.width * self.height) - 1
+        for cell in self.__blocked_cells__():
+            self.__open__ ^= 1 << cell
+            for n in self.__geometry__.neighbours[cell]:
+                self.__degree__[n] -= 1
+        self.__clear_cache__()
+        self.__forget_regions__()
+        self.__rehash__()
+
+    @property
+    def __last_player_move__(self):
+        """
+        A dict mapping each player to its location. Kept for compatibility
+        with code that copies the state of the board directly.
+        """
+        return {self.__player_1__: self.get_player_location(self.__player_1__),
+                self.__player_2__: self.get_player_location(self.__player_2__)}
+
+    @__last_player_move__.setter
+    def __last_player_move__(self, last_player_move):
+        self.__cell_1__ = self.__move_cell__(last_player_move[self.__player_1__])
+        self.__cell_2__ = self.__move_cell__(last_player_move[self.__player_2__])
+        self.__clear_cache__()
+        self.__forget_regions__()
+        self.__rehash__()
+
+    @property
+    def __player_symbols__(self):
+        """
+        A dict mapping each player to the symbol marking its cells. Kept for
+        compatibility; the symbols are fixed by the player order, so
+        assigning to this attribute has no effect.
+        """
+        return {Board.BLANK: Board.BLANK, self.__player_1__: 1, self.__player_2__: 2}
+
+    @__player_symbols__.setter
+    def __player_symbols__(self, player_symbols):
+        pass
+
     def get_opponent(self, player):
         """
         Return the opponent of the supplied player.
@@ -93,15 +171,200 @@ class Board(object):
 
     def copy(self):
         """ Return a deep copy of the current board. """
-        new_board = Board(self.__player_1__, self.__player_2__, width=self.width, height=self.height)
+        new_board = Board.__new__(Board)
+        new_board.width = self.width
+        new_board.height = self.height
         new_board.move_count = self.move_count
+        new_board.__player_1__ = self.__player_1__
+        new_board.__player_2__ = self.__player_2__
         new_board.__active_player__ = self.__active_player__
         new_board.__inactive_player__ = self.__inactive_player__
-        new_board.__last_player_move__ = copy(self.__last_player_move__)
-        new_board.__player_symbols__ = copy(self.__player_symbols__)
-        new_board.__board_state__ = deepcopy(self.__board_state__)
+        new_board.__geometry__ = self.__geometry__
+        new_board.__cells__ = self.__cells__[:]
+        new_board.__degree__ = self.__degree__[:]
+        new_board.__open__ = self.__open__
+        new_board.__cell_1__ = self.__cell_1__
+        new_board.__cell_2__ = self.__cell_2__
+        new_board.__history__ = self.__history__[:]
+        new_board.__zobrist__ = self.__zobrist__
+        new_board.__moves_1__ = self.__moves_1__
+        new_board.__moves_2__ = self.__moves_2__
+        new_board.__blanks__ = self.__blanks__
+        new_board.__region_1__ = self.__region_1__
+        new_board.__region_2__ = self.__region_2__
+        new_board.__region_history__ = self.__region_history__[:]
+        return new_board
+
+    def get_hash(self):
+        """
+        Return the 64-bit Zobrist hash of the current game state, covering the
+        blocked cells, the location of each player and the player to move.
+
+        The hash is updated incrementally by `apply_move()` and `undo_move()`,
+        so this call is O(1). Equal positions always have equal hashes;
+        different positions collide with negligible probability.
+        """
+        if self.__active_player__ == self.__player_1__:
+            return self.__zobrist__
+        return self.__zobrist__ ^ self.__geometry__.zobrist_side
+
+    def transform(self, transform):
+        """
+        Return a copy of the board mapped through one of its symmetries.
+
+        Parameters
+        ----------
+        transform : int
+            The index of a transform in `isolation.geometry.TRANSFORMS`.
+            Square boards support all eight transforms; other boards only
+            support 0 (identity), 2 (rotation by 180 degrees), 4 (mirror
+            left-right) and 5 (mirror top-bottom).
+
+        Returns
+        ----------
+        `isolation.Board`
+            A copy of the board with every cell, including the location of
+            each player, moved to its image under the transform.
+        """
+        symmetry = self.__geometry__.symmetries[transform]
+        if symmetry is None:
+            raise ValueError("Transform {} does not map a {}x{} board onto itself.".format(
+                transform, self.width, self.height))
+        new_board = self.copy()
+        new_board.__permute__(symmetry)
         return new_board
 
+    def canonical(self):
+        """
+        Return the canonical form of the current game state under the
+        symmetries of the board, so that positions that only differ by a
+        rotation or reflection have the same canonical form.
+
+        Returns
+        ----------
+        (`isolation.Board`, int)
+            The canonical board and the index of the transform that maps the
+            current board onto it. Moves chosen on the canonical board can be
+            mapped back with `untransform_move()`.
+        """
+        blocked_cells = self.__blocked_cells__()
+        best_key, best_transform = None, 0
+        for transform, symmetry in enumerate(self.__geometry__.symmetries):
+            if symmetry is None:
+                continue
+            key = (sum(1 << symmetry[cell] for cell in blocked_cells),
+                   symmetry[self.__cell_1__] if self.__cell_1__ >= 0 else -1,
+                   symmetry[self.__cell_2__] if self.__cell_2__ >= 0 else -1)
+            if best_key is None or key < best_key:
+                best_key, best_transform = key, transform
+        return self.transform(best_transform), best_transform
+
+    def transform_move(self, move, transform):
+        """
+        Return the image of a (row, column) pair under a transform (see
+        `transform()`); NOT_MOVED is returned unchanged.
+        """
+        if move == Board.NOT_MOVED:
+            return move
+        return self.__geometry__.cells[self.__geometry__.symmetries[transform][self.__move_cell__(move)]]
+
+    def untransform_move(self, move, transform):
+        """
+        Map a (row, column) pair on a transformed board back to the board it
+        was transformed from, i.e. apply the inverse of the transform.
+        """
+        return self.transform_move(move, INVERSE_TRANSFORMS[transform])
+
+    def to_int(self):
+        """
+        Encode the current game state as a single non-negative integer.
+
+        From the least significant bit, the fields are the width (8 bits),
+        the height (8 bits), the move count, a bit set when player 2 is to
+        move, the cell index plus one of player 1 and of player 2 (0 if not
+        moved), and the bitmask of blocked cells. The move count and the
+        cell fields use `(width * height).bit_length()` bits each.
+
+        The encoding does not include the players themselves, the undo
+        history, or which player blocked each cell.
+        """
+        width, height = self.width, self.height
+        bits = (width * height).bit_length()
+        blocked = 0
+        for cell in self.__blocked_cells__():
+            blocked |= 1 << cell
+        side = 0 if self.__active_player__ == self.__player_1__ else 1
+        value = blocked << bits | (self.__cell_2__ + 1)
+        value = value << bits | (self.__cell_1__ + 1)
+        value = value << 1 | side
+        value = value << bits | self.move_count
+        return value << 16 | height << 8 | width
+
+    @classmethod
+    def from_int(cls, value, player_1, player_2):
+        """
+        Decode a game state encoded by `to_int()`.
+
+        Parameters
+        ----------
+        value : int
+            The encoded game state.
+
+        player_1 : object
+            The object to register as the first player.
+
+        player_2 : object
+            The object to register as the second player.
+
+        Returns
+        ----------
+        `isolation.Board`
+            A new board of the class this method is called on. Blocked cells
+            other than the player locations are marked with the symbol of
+            player 1, and no move can be undone past this state.
+        """
+        width = value & 0xff
+        height = value >> 8 & 0xff
+        bits = (width * height).bit_length()
+        mask = (1 << bits) - 1
+        value >>= 16
+        move_count = value & mask
+        value >>= bits
+        side = value & 1
+        value >>= 1
+        cell_1 = (value & mask) - 1
+        value >>= bits
+        cell_2 = (value & mask) - 1
+        blocked = value >> bits
+
+        board = cls(player_1, player_2, width=width, height=height)
+        for cell in range(width * height):
+            if blocked >> cell & 1:
+                board.__occupy__(cell, 2 if cell == cell_2 else 1)
+        board.__cell_1__ = cell_1
+        board.__cell_2__ = cell_2
+        if side:
+            board.__active_player__, board.__inactive_player__ = player_2, player_1
+        board.move_count = move_count
+        board.__rehash__()
+        return board
+
+    def to_bytes(self):
+        """
+        Encode the current game state as a short byte string: the little
+        endian representation of `to_int()` (11 bytes for a 7x7 board).
+        """
+        value = self.to_int()
+        return value.to_bytes((value.bit_length() + 7) // 8, "little")
+
+    @classmethod
+    def from_bytes(cls, data, player_1, player_2):
+        """
+        Decode a game state encoded by `to_bytes()`, registering the given
+        players on the new board (see `from_int()`).
+        """
+        return cls.from_int(int.from_bytes(data, "little"), player_1, player_2)
+
     def forecast_move(self, move):
         """
         Return a deep copy of the current game with an input move applied to
@@ -140,14 +403,18 @@ class Board(object):
         row, col = move
         return 0 <= row < self.height and \
                0 <= col < self.width and \
-               self.__board_state__[row][col] == Board.BLANK
+               self.__cells__[row * self.width + col] == Board.BLANK
 
     def get_blank_spaces(self):
         """
         Return a list of the locations that are still available on the board.
+
+        The list is cached until the next move is applied or undone; each
+        call returns a new copy of it, which callers are free to modify.
         """
-        return [(i, j) for j in range(self.width) for i in range(self.height)
-            if self.__board_state__[i][j] == Board.BLANK]
+        if self.__blanks__ is None:
+            self.__blanks__ = self.__find_blank_spaces__()
+        return list(self.__blanks__)
 
     def get_player_location(self, player):
         """
@@ -163,12 +430,18 @@ class Board(object):
         (int, int)
             The coordinate pair (row, column) of the input player.
         """
-        return self.__last_player_move__[player]
+        cell = self.__player_cell__(player)
+        if cell < 0:
+            return Board.NOT_MOVED
+        return self.__geometry__.cells[cell]
 
     def get_legal_moves(self, player=None):
         """
         Return the list of all legal moves for the specified player.
 
+        The list is cached until the next move is applied or undone; each
+        call returns a new copy of it, which callers are free to modify.
+
         Parameters
         ----------
         player : object (optional)
@@ -183,7 +456,124 @@ class Board(object):
         """
         if player is None:
             player = self.active_player
-        return self.__get_moves__(self.__last_player_move__[player])
+        if player == self.__player_1__:
+            if self.__moves_1__ is None:
+                self.__moves_1__ = self.__player_moves__(self.__cell_1__)
+            return list(self.__moves_1__)
+        if self.__moves_2__ is None:
+            self.__moves_2__ = self.__player_moves__(self.__cell_2__)
+        return list(self.__moves_2__)
+
+    def count_legal_moves(self, player=None):
+        """
+        Return the number of legal moves for the specified player. This is
+        equal to `len(self.get_legal_moves(player))`, but it is read from the
+        degree map maintained by `apply_move()` without generating the moves.
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If None,
+            return the number of legal moves for the active player.
+
+        Returns
+        ----------
+        int
+            The number of legal moves for the player.
+        """
+        if player is None:
+            player = self.active_player
+        cell = self.__player_cell__(player)
+        if cell < 0:
+            return self.__cells__.count(Board.BLANK)
+        return self.__degree__[cell]
+
+    def get_degree(self, move):
+        """
+        Return the number of open cells a knight could move to from the given
+        location, whether or not the location itself is open.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) on the board.
+
+        Returns
+        ----------
+        int
+            The number of blank cells one knight move away from the location.
+        """
+        return self.__degree__[move[0] * self.width + move[1]]
+
+    def get_reachable_cells(self, player=None):
+        """
+        Return the list of the blank cells that the specified player can
+        reach through a sequence of knight moves over blank cells, i.e. the
+        cells it could still occupy if the opponent did not move. A player
+        that has not moved yet can reach every blank cell.
+
+        The region is computed on demand and cached; after a move it is only
+        recomputed for the players whose region the move could change.
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If None,
+            return the region of the active player.
+
+        Returns
+        ----------
+        list<(int, int)>
+            The coordinate pairs (row, column) of the reachable cells, in
+            row-major order.
+        """
+        region = self.__player_region__(player)
+        cells = self.__geometry__.cells
+        return [cells[cell] for cell in range(len(cells)) if region >> cell & 1]
+
+    def count_reachable(self, player=None):
+        """
+        Return the number of blank cells the specified player can reach (see
+        `get_reachable_cells()`) without generating the list.
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If None,
+            return the size of the region of the active player.
+
+        Returns
+        ----------
+        int
+            The number of reachable cells.
+        """
+        return bin(self.__player_region__(player)).count("1")
+
+    def regions_overlap(self):
+        """
+        Test whether some blank cell can be reached by both players (see
+        `get_reachable_cells()`), i.e. whether a player can still block a
+        cell the other might need.
+        """
+        return bool(self.__player_region__(self.__player_1__) &
+                    self.__player_region__(self.__player_2__))
+
+    def is_partitioned(self):
+        """
+        Test whether the players are separated: both have moved and no open
+        cell can be reached by both of them through a sequence of knight
+        moves. From then on the moves of one player can never block the
+        other, and each player plays alone in its own region of the board.
+
+        Returns
+        ----------
+        bool
+            Returns True if the reachable regions of the players are
+            disjoint, False otherwise
+        """
+        if self.__cell_1__ < 0 or self.__cell_2__ < 0:
+            return False
+        return not self.regions_overlap()
 
     def apply_move(self, move):
         """
@@ -200,18 +590,77 @@ class Board(object):
         None
         """
         row, col = move
-        self.__last_player_move__[self.active_player] = move
-        self.__board_state__[row][col] = self.__player_symbols__[self.active_player]
+        cell = row * self.width + col
+        geometry = self.__geometry__
+        if self.__active_player__ == self.__player_1__:
+            symbol = 1
+            last_cell = self.__cell_1__
+            self.__cell_1__ = cell
+        else:
+            symbol = 2
+            last_cell = self.__cell_2__
+            self.__cell_2__ = cell
+        keys = geometry.zobrist_players[symbol - 1]
+        self.__zobrist__ ^= keys[cell] ^ geometry.zobrist_blocked[cell]
+        if last_cell >= 0:
+            self.__zobrist__ ^= keys[last_cell]
+        self.__history__.append(last_cell)
+        self.__occupy__(cell, symbol)
+        # the region of the opponent only changes if it contained the cell,
+        # and the region of the player is flood filled again from its new cell
+        regions = (self.__region_1__, self.__region_2__)
+        self.__region_history__.append(regions)
+        self.__clear_cache__()
+        other = regions[2 - symbol]
+        if other is not None and not other >> cell & 1:
+            if symbol == 1:
+                self.__region_2__ = other
+            else:
+                self.__region_1__ = other
         self.__active_player__, self.__inactive_player__ = self.__inactive_player__, self.__active_player__
         self.move_count += 1
 
+    def undo_move(self):
+        """
+        Revert the last move applied to the board, restoring the previous
+        location of the player who made it, the blocked cells, the player
+        holding initiative, and the move count.
+
+        Together with `apply_move()` this allows a search to walk the game
+        tree on a single board instead of creating a copy for every node.
+
+        Returns
+        ----------
+        None
+        """
+        if not self.__history__:
+            raise RuntimeError("There is no move to undo on this board.")
+        self.__active_player__, self.__inactive_player__ = self.__inactive_player__, self.__active_player__
+        geometry = self.__geometry__
+        last_cell = self.__history__.pop()
+        if self.__active_player__ == self.__player_1__:
+            keys = geometry.zobrist_players[0]
+            cell = self.__cell_1__
+            self.__cell_1__ = last_cell
+        else:
+            keys = geometry.zobrist_players[1]
+            cell = self.__cell_2__
+            self.__cell_2__ = last_cell
+        self.__zobrist__ ^= keys[cell] ^ geometry.zobrist_blocked[cell]
+        if last_cell >= 0:
+            self.__zobrist__ ^= keys[last_cell]
+        self.__vacate__(cell)
+        self.__clear_cache__()
+        self.__region_1__, self.__region_2__ = self.__region_history__.pop()
+        self.move_count -= 1
+
     def is_winner(self, player):
         """ Test whether the specified player has won the game. """
-        return player == self.inactive_player and not self.get_legal_moves(self.active_player)
+        return player == self.inactive_player and not self.count_legal_moves(self.active_player)
 
     def is_loser(self, player):
         """ Test whether the specified player has lost the game. """
-        return player == self.active_player and not self.get_legal_moves(self.active_player)
+        return player == self.active_player and not self.count_legal_moves(self.active_player)
 
     def utility(self, player):
         """
@@ -237,7 +686,7 @@ class Board(object):
             otherwise.
         """
 
-        if not self.get_legal_moves(self.active_player):
+        if not self.count_legal_moves(self.active_player):
 
             if player == self.inactive_player:
                 return float("inf")
@@ -256,14 +705,130 @@ class Board(object):
         if move == Board.NOT_MOVED:
             return self.get_blank_spaces()
 
-        r, c = move
+        return self.__cell_moves__(self.__move_cell__(move))
 
-        directions = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
-                      (1, -2),  (1, 2), (2, -1),  (2, 1)]
-
-        valid_moves = [(r+dr,c+dc) for dr, dc in directions if self.move_is_legal((r+dr, c+dc))]
-
-        return valid_moves
+    def __player_moves__(self, cell):
+        """ Generate the list of legal moves for a player standing on a cell. """
+        if cell < 0:
+            return self.get_blank_spaces()
+        return self.__cell_moves__(cell)
+
+    def __cell_moves__(self, cell):
+        """ Generate the list of open knight destinations from a cell index. """
+        cells = self.__cells__
+        moves = self.__geometry__.cells
+        return [moves[n] for n in self.__geometry__.neighbours[cell] if not cells[n]]
+
+    def __find_blank_spaces__(self):
+        """ Generate the list of blank cells in column-major order. """
+        cells = self.__cells__
+        moves = self.__geometry__.cells
+        return [moves[n] for n in self.__geometry__.column_order if not cells[n]]
+
+    def __clear_cache__(self):
+        """ Drop the legal moves, blank spaces and regions cached for the last state. """
+        self.__moves_1__ = None
+        self.__moves_2__ = None
+        self.__blanks__ = None
+        self.__region_1__ = None
+        self.__region_2__ = None
+
+    def __forget_regions__(self):
+        """ Drop the regions saved for undo_move() when the state is rewritten. """
+        self.__region_history__ = [(None, None)] * len(self.__region_history__)
+
+    def __player_region__(self, player):
+        """ Return the cached bitmask of the cells reachable by a player. """
+        if player is None:
+            player = self.active_player
+        if player == self.__player_1__:
+            if self.__region_1__ is None:
+                self.__region_1__ = self.__reachable__(self.__cell_1__)
+            return self.__region_1__
+        if self.__region_2__ is None:
+            self.__region_2__ = self.__reachable__(self.__cell_2__)
+        return self.__region_2__
+
+    def __occupy__(self, cell, symbol):
+        """ Block a cell with the symbol of the player moving onto it. """
+        self.__cells__[cell] = symbol
+        self.__open__ &= ~(1 << cell)
+        degree = self.__degree__
+        for n in self.__geometry__.neighbours[cell]:
+            degree[n] -= 1
+
+    def __vacate__(self, cell):
+        """ Reopen a cell blocked by the move being undone. """
+        self.__cells__[cell] = Board.BLANK
+        self.__open__ |= 1 << cell
+        degree = self.__degree__
+        for n in self.__geometry__.neighbours[cell]:
+            degree[n] += 1
+
+    def __permute__(self, symmetry):
+        """ Move the contents of every cell to its image under a permutation. """
+        self.__permute_cells__(symmetry)
+        if self.__cell_1__ >= 0:
+            self.__cell_1__ = symmetry[self.__cell_1__]
+        if self.__cell_2__ >= 0:
+            self.__cell_2__ = symmetry[self.__cell_2__]
+        self.__history__ = [symmetry[cell] if cell >= 0 else -1 for cell in self.__history__]
+        self.__clear_cache__()
+        self.__forget_regions__()
+        self.__rehash__()
+
+    def __permute_cells__(self, symmetry):
+        """ Move the grid and the degree map through a permutation of the cells. """
+        cells = bytearray(len(self.__cells__))
+        degree = bytearray(len(self.__degree__))
+        for cell, image in enumerate(symmetry):
+            cells[image] = self.__cells__[cell]
+            degree[image] = self.__degree__[cell]
+        self.__cells__ = cells
+        self.__degree__ = degree
+        self.__open__ = sum(1 << cell for cell in range(len(cells)) if not cells[cell])
+
+    def __player_cell__(self, player):
+        """ Return the cell index of the specified player (-1 if not moved). """
+        if player == self.__player_1__:
+            return self.__cell_1__
+        return self.__cell_2__
+
+    def __move_cell__(self, move):
+        """ Return the cell index of a (row, column) pair (-1 for NOT_MOVED). """
+        if move == Board.NOT_MOVED:
+            return -1
+        return move[0] * self.width + move[1]
+
+    def __rehash__(self):
+        """ Recompute the Zobrist hash of the board from scratch. """
+        geometry = self.__geometry__
+        zobrist = 0
+        for cell in self.__blocked_cells__():
+            zobrist ^= geometry.zobrist_blocked[cell]
+        if self.__cell_1__ >= 0:
+            zobrist ^= geometry.zobrist_players[0][self.__cell_1__]
+        if self.__cell_2__ >= 0:
+            zobrist ^= geometry.zobrist_players[1][self.__cell_2__]
+        self.__zobrist__ = zobrist
+
+    def __blocked_cells__(self):
+        """ Return the list of the indices of the blocked cells. """
+        return [cell for cell, value in enumerate(self.__cells__) if value]
+
+    def __open_mask__(self):
+        """ Return the bitmask of the blank cells. """
+        return self.__open__
+
+    def __reachable__(self, cell):
+        """
+        Return the bitmask of the blank cells that can be reached from a cell
+        index through knight moves over blank cells; every blank cell for
+        index -1 (a player that has not moved).
+        """
+        if cell < 0:
+            return self.__open_mask__()
+        return self.__geometry__.reachable(cell, self.__open_mask__())
 
     def print_board(self):
         """DEPRECATED - use Board.to_string()"""
@@ -275,8 +840,7 @@ class Board(object):
         blocked, and which remain open.
         """
 
-        p1_loc = self.__last_player_move__[self.__player_1__]
-        p2_loc = self.__last_player_move__[self.__player_2__]
+        blank_spaces = set(self.get_blank_spaces())
 
         out = ''
 
@@ -284,12 +848,13 @@ class Board(object):
             out += ' | '
 
             for j in range(self.width):
+                cell = i * self.width + j
 
-                if not self.__board_state__[i][j]:
+                if (i, j) in blank_spaces:
                     out += ' '
-                elif p1_loc and i == p1_loc[0] and j == p1_loc[1]:
+                elif cell == self.__cell_1__:
                     out += '1'
-                elif p2_loc and i == p2_loc[0] and j == p2_loc[1]:
+                elif cell == self.__cell_2__:
                     out += '2'
                 else:
                     out += '-'
@@ -345,7 +910,8 @@ class Board(object):
             if move_end < 0:
                 return self.__inactive_player__, move_history, "timeout"
 
-            if curr_move not in legal_player_moves:
+            # the agent may have modified its list: check against the board
+            if curr_move not in self.get_legal_moves():
                 return self.__inactive_player__, move_history, "illegal move"
 
             self.apply_move(curr_move)
@@ -0,0 +1,549 @@
+"""
+This file contains test cases for the alternative `isolation` board backends,
+which must follow the same rules and expose the same interface as the
+reference `isolation.Board` implementation.
+"""
+import os
+import random
+import tempfile
+import unittest
+
+import isolation
+import game_agent
+
+from isolation.book import OpeningBook
+from isolation.book import position_key
+from isolation.book import write_book
+from isolation.geometry import get_geometry
+from sample_players import improved_score
+
+try:
+    import numpy
+    from isolation.batch import BoardBatch
+except ImportError:
+    numpy = None
+
+
+class BitBoardTest(unittest.TestCase):
+
+    def assertSameState(self, board, bitboard):
+        for player in (board.active_player, board.inactive_player):
+            self.assertEqual(board.get_legal_moves(player),
+                             bitboard.get_legal_moves(player))
+            self.assertEqual(board.get_player_location(player),
+                             bitboard.get_player_location(player))
+            self.assertEqual(board.utility(player), bitboard.utility(player))
+        self.assertEqual(board.active_player, bitboard.active_player)
+        self.assertEqual(board.get_blank_spaces(), bitboard.get_blank_spaces())
+        self.assertEqual(board.to_string(), bitboard.to_string())
+        self.assertEqual(board.move_count, bitboard.move_count)
+
+    def test_state_attributes(self):
+        """ The legacy state attributes copy a BitBoard onto a new one """
+        for source_cls in (isolation.Board, isolation.BitBoard):
+            board = source_cls("p1", "p2", 5, 4)
+            for move in [(0, 0), (3, 4), (2, 1), (1, 2)]:
+                board.apply_move(move)
+            bitboard = isolation.BitBoard("p1", "p2", 5, 4)
+            bitboard.move_count = board.move_count
+            bitboard.__last_player_move__ = board.__last_player_move__
+            bitboard.__player_symbols__ = board.__player_symbols__
+            bitboard.__board_state__ = board.__board_state__
+            self.assertSameState(board, bitboard)
+            self.assertEqual(bitboard.get_hash(), board.get_hash())
+            self.assertEqual(bitboard.__board_state__[1], [0, 0, 2, 0, 0])
+
+            bitboard.apply_move((0, 3))
+            board.apply_move((0, 3))
+            self.assertSameState(board, bitboard)
+
+    def test_random_games(self):
+        """ BitBoard follows the same rules as Board during random games """
+        rng = random.Random(0)
+        for w, h in [(7, 7), (5, 8), (9, 4)]:
+            for _ in range(10):
+                board = isolation.Board("p1", "p2", w, h)
+                bitboard = isolation.BitBoard("p1", "p2", w, h)
+                self.assertSameState(board, bitboard)
+                while board.get_legal_moves():
+                    move = rng.choice(board.get_legal_moves())
+                    self.assertTrue(bitboard.move_is_legal(move))
+                    board = board.forecast_move(move)
+                    bitboard = bitboard.forecast_move(move)
+                    self.assertFalse(bitboard.move_is_legal(move))
+                    self.assertSameState(board, bitboard)
+
+    def test_alphabeta(self):
+        """ CustomPlayer searches a BitBoard exactly like a Board """
+        agent = game_agent.CustomPlayer(3, game_agent.custom_score,
+                                        False, "alphabeta")
+        agent.time_left = lambda: 1e3
+        results = []
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            board = board_cls(agent, "null_agent", 7, 7)
+            board.apply_move((2, 3))
+            board.apply_move((0, 0))
+            legal_moves = board.get_legal_moves()
+            move = agent.get_move(board, legal_moves, lambda: 1e3)
+            self.assertIn(move, legal_moves)
+            results.append(agent.alphabeta(board, 3))
+        self.assertEqual(len(set(results)), 1)
+
+
+class UndoMoveTest(unittest.TestCase):
+
+    def test_undo_restores_state(self):
+        """ undo_move() reverts apply_move() one ply at a time """
+        rng = random.Random(1)
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            board = board_cls("p1", "p2", 6, 7)
+            snapshots = []
+            while board.get_legal_moves():
+                snapshots.append((board.to_string(), board.active_player,
+                                  board.move_count, board.get_legal_moves()))
+                board.apply_move(rng.choice(board.get_legal_moves()))
+            while snapshots:
+                board.undo_move()
+                self.assertEqual((board.to_string(), board.active_player,
+                                  board.move_count, board.get_legal_moves()),
+                                 snapshots.pop())
+            self.assertRaises(RuntimeError, board.undo_move)
+
+    def test_inplace_search(self):
+        """ In-place search returns the same result as forecast_move search """
+        for method in ("minimax", "alphabeta"):
+            results = []
+            for inplace in (False, True):
+                agent = game_agent.CustomPlayer(4, improved_score,
+                                                False, method, inplace=inplace)
+                agent.time_left = lambda: 1e3
+                board = isolation.Board(agent, "null_agent", 7, 7)
+                board.apply_move((2, 3))
+                board.apply_move((0, 0))
+                before = board.to_string()
+                search = getattr(agent, method)
+                results.append(search(board, 4))
+                self.assertEqual(board.to_string(), before)
+            self.assertEqual(results[0], results[1])
+
+
+class ZobristHashTest(unittest.TestCase):
+
+    def reference_hash(self, board):
+        """Compute the Zobrist hash of a board from scratch."""
+        geometry = get_geometry(board.width, board.height)
+        blank_spaces = set(board.get_blank_spaces())
+        value = 0
+        for cell, move in enumerate(geometry.cells):
+            if move not in blank_spaces:
+                value ^= geometry.zobrist_blocked[cell]
+        for keys, player in zip(geometry.zobrist_players, ("p1", "p2")):
+            move = board.get_player_location(player)
+            if move is not None:
+                value ^= keys[move[0] * board.width + move[1]]
+        if board.active_player == "p2":
+            value ^= geometry.zobrist_side
+        return value
+
+    def test_incremental_hash(self):
+        """ The incremental hash matches a full recomputation """
+        rng = random.Random(2)
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            board = board_cls("p1", "p2", 5, 6)
+            hashes = []
+            while board.get_legal_moves():
+                self.assertEqual(board.get_hash(), self.reference_hash(board))
+                self.assertEqual(board.copy().get_hash(), board.get_hash())
+                hashes.append(board.get_hash())
+                board.apply_move(rng.choice(board.get_legal_moves()))
+            self.assertEqual(len(set(hashes)), len(hashes))
+            while hashes:
+                board.undo_move()
+                self.assertEqual(board.get_hash(), hashes.pop())
+
+    def test_transposition(self):
+        """ Move orders reaching the same position share the same hash """
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            first = board_cls("p1", "p2")
+            second = board_cls("p1", "p2")
+            for move in [(0, 3), (4, 3), (2, 2), (2, 4)]:
+                first.apply_move(move)
+            for move in [(4, 3), (0, 3), (2, 2), (2, 4)]:
+                second.apply_move(move)
+            self.assertEqual(first.to_string(), second.to_string())
+            self.assertEqual(first.get_hash(), second.get_hash())
+            second.undo_move()
+            self.assertNotEqual(first.get_hash(), second.get_hash())
+
+
+class MobilityTest(unittest.TestCase):
+
+    def assertMobility(self, board):
+        for player in ("p1", "p2"):
+            self.assertEqual(board.count_legal_moves(player),
+                             len(board.get_legal_moves(player)))
+        self.assertEqual(board.count_legal_moves(), len(board.get_legal_moves()))
+        for r in range(board.height):
+            for c in range(board.width):
+                self.assertEqual(board.get_degree((r, c)), sum(
+                    1 for m in get_geometry(board.width, board.height).moves[r][c]
+                    if board.move_is_legal(m)))
+
+    def test_degree_map(self):
+        """ Legal-move counts track apply_move() and undo_move() """
+        rng = random.Random(6)
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            board = board_cls("p1", "p2", 6, 5)
+            while board.get_legal_moves():
+                self.assertMobility(board)
+                self.assertMobility(board.copy())
+                board.apply_move(rng.choice(board.get_legal_moves()))
+            self.assertMobility(board)
+            while board.move_count:
+                board.undo_move()
+                self.assertMobility(board)
+
+
+class CachedQueriesTest(unittest.TestCase):
+
+    def test_cache(self):
+        """ Derived queries are cached per state and refreshed on each move """
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            board = board_cls("p1", "p2")
+            board.apply_move((3, 3))
+            board.apply_move((0, 0))
+            moves = board.get_legal_moves()
+            blanks = board.get_blank_spaces()
+            self.assertEqual(board.get_legal_moves("p1"), moves)
+            self.assertEqual(board.get_blank_spaces(), blanks)
+            self.assertEqual(board.copy().get_legal_moves(), moves)
+
+            # callers get copies: modifying them leaves the cache intact
+            board.get_legal_moves().clear()
+            board.get_blank_spaces().clear()
+            board.copy().get_legal_moves().append((6, 6))
+            self.assertEqual(board.get_legal_moves(), moves)
+            self.assertEqual(board.get_blank_spaces(), blanks)
+            self.assertEqual(board.count_legal_moves(), len(moves))
+
+            board.apply_move((1, 5))
+            self.assertNotIn((1, 5), board.get_blank_spaces())
+            self.assertEqual(board.get_legal_moves(), [(1, 2), (2, 1)])
+            board.undo_move()
+            self.assertEqual(board.get_legal_moves(), moves)
+            self.assertEqual(board.get_blank_spaces(), blanks)
+
+
+    def test_play_copies_moves(self):
+        """ An agent adding a move to its list of legal moves cannot make the
+        referee accept it """
+        class Cheater(object):
+            def get_move(self, game, legal_moves, time_left):
+                legal_moves.append((-5, -5))
+                return (-5, -5)
+
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            cheater = Cheater()
+            board = board_cls(cheater, "p2")
+            winner, history, termination = board.play()
+            self.assertEqual((winner, termination), ("p2", "illegal move"))
+            self.assertNotIn((-5, -5), board.get_legal_moves(cheater))
+
+
+class SymmetryTest(unittest.TestCase):
+
+    def test_canonical(self):
+        """ Symmetric positions share one canonical form """
+        rng = random.Random(7)
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            board = board_cls("p1", "p2")
+            for _ in range(9):
+                board.apply_move(rng.choice(board.get_legal_moves()))
+            canonical, transform = board.canonical()
+            self.assertEqual(canonical.to_string(), board.transform(transform).to_string())
+            self.assertEqual(sorted(canonical.get_legal_moves()), sorted(
+                board.transform_move(m, transform) for m in board.get_legal_moves()))
+            for m in board.get_legal_moves():
+                self.assertEqual(board.untransform_move(board.transform_move(m, transform), transform), m)
+            previous = board.copy()
+            previous.undo_move()
+            for t in range(8):
+                image = board.transform(t)
+                self.assertEqual(image.count_legal_moves(), board.count_legal_moves())
+                image_canonical, image_transform = image.canonical()
+                self.assertEqual(image_canonical.to_string(), canonical.to_string())
+                self.assertEqual(image_canonical.get_hash(), canonical.get_hash())
+                # undo_move() also works on a transformed board
+                image.undo_move()
+                self.assertEqual(image.canonical()[0].get_hash(),
+                                 previous.canonical()[0].get_hash())
+
+    def test_opening_positions(self):
+        """ The 49 opening moves on a 7x7 board reduce to 10 positions """
+        board = isolation.Board("p1", "p2")
+        openings = set(board.forecast_move(m).canonical()[0].get_hash()
+                       for m in board.get_legal_moves())
+        self.assertEqual(len(openings), 10)
+
+    def test_rectangular_board(self):
+        """ Only transforms that preserve the shape apply to other boards """
+        board = isolation.Board("p1", "p2", 5, 7)
+        board.apply_move((0, 1))
+        self.assertRaises(ValueError, board.transform, 1)
+        self.assertEqual(board.transform(4).get_player_location("p1"), (0, 3))
+        self.assertEqual(board.transform(5).get_player_location("p1"), (6, 1))
+
+
+class SerializationTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        """ Encoded positions decode to the same game state """
+        rng = random.Random(8)
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            for w, h in [(7, 7), (4, 9), (1, 1)]:
+                board = board_cls("p1", "p2", w, h)
+                while True:
+                    for decoded in (board_cls.from_int(board.to_int(), "p1", "p2"),
+                                    board_cls.from_bytes(board.to_bytes(), "p1", "p2"),
+                                    isolation.Board.from_bytes(board.to_bytes(), "p1", "p2")):
+                        self.assertEqual(decoded.to_string(), board.to_string())
+                        self.assertEqual(decoded.get_hash(), board.get_hash())
+                        self.assertEqual(decoded.active_player, board.active_player)
+                        self.assertEqual(decoded.move_count, board.move_count)
+                        self.assertEqual(decoded.get_legal_moves(), board.get_legal_moves())
+                        self.assertEqual(decoded.count_legal_moves("p2"),
+                                         board.count_legal_moves("p2"))
+                    if not board.get_legal_moves():
+                        break
+                    board.apply_move(rng.choice(board.get_legal_moves()))
+
+    def test_size(self):
+        """ A 7x7 position fits in 11 bytes """
+        board = isolation.Board("p1", "p2")
+        for move in [(6, 6), (0, 0), (4, 5), (2, 1)]:
+            board.apply_move(move)
+        self.assertLessEqual(len(board.to_bytes()), 11)
+        self.assertNotEqual(board.to_int(), board.forecast_move((2, 4)).to_int())
+
+
+class CompactBoardTest(unittest.TestCase):
+
+    def test_slots(self):
+        """ Boards do not carry a per-instance __dict__ """
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            board = board_cls("p1", "p2")
+            self.assertFalse(hasattr(board, "__dict__"))
+            self.assertFalse(hasattr(board.copy(), "__dict__"))
+
+    def test_state_attributes(self):
+        """ The legacy state attributes can be copied onto a new board """
+        board = isolation.Board("p1", "p2", 5, 4)
+        for move in [(0, 0), (3, 4), (2, 1), (1, 2)]:
+            board.apply_move(move)
+        self.assertEqual(board.__last_player_move__, {"p1": (2, 1), "p2": (1, 2)})
+        self.assertEqual(board.__board_state__[0], [1, 0, 0, 0, 0])
+        self.assertEqual(board.__board_state__[3], [0, 0, 0, 0, 2])
+
+        new_board = isolation.Board("p1", "p2", 5, 4)
+        new_board.move_count = board.move_count
+        new_board.__last_player_move__ = board.__last_player_move__
+        new_board.__player_symbols__ = board.__player_symbols__
+        new_board.__board_state__ = board.__board_state__
+        self.assertEqual(new_board.to_string(), board.to_string())
+        self.assertEqual(new_board.get_legal_moves(), board.get_legal_moves())
+        self.assertEqual(new_board.get_hash(), board.get_hash())
+        self.assertEqual(new_board.count_legal_moves(), board.count_legal_moves())
+        self.assertEqual(new_board.get_degree((0, 2)), board.get_degree((0, 2)))
+
+
+@unittest.skipIf(numpy is None, "BoardBatch requires NumPy")
+class BoardBatchTest(unittest.TestCase):
+
+    def random_boards(self, rng, count, w=7, h=7):
+        """Return boards stopped at random points of random games."""
+        boards = []
+        for _ in range(count):
+            board = isolation.Board("p1", "p2", w, h)
+            for _ in range(rng.randint(0, w * h)):
+                if not board.get_legal_moves():
+                    break
+                board.apply_move(rng.choice(board.get_legal_moves()))
+            boards.append(board)
+        return boards
+
+    def test_matches_board(self):
+        """ BoardBatch computes the same moves and results as Board """
+        rng = random.Random(3)
+        boards = self.random_boards(rng, 60, 6, 5)
+        batch = BoardBatch.from_boards(boards)
+        mobility = [batch.mobility(p) for p in (0, 1)]
+        utility = [batch.utility(p) for p in (0, 1)]
+        terminal = batch.is_terminal()
+        for idx, board in enumerate(boards):
+            self.assertEqual(batch.get_legal_moves(idx), board.get_legal_moves())
+            for p, player in enumerate(("p1", "p2")):
+                self.assertEqual(mobility[p][idx], len(board.get_legal_moves(player)))
+                self.assertEqual(utility[p][idx], board.utility(player))
+            self.assertEqual(terminal[idx], not board.get_legal_moves())
+
+    def test_apply_moves(self):
+        """ Applying one move per position matches Board.apply_move() """
+        rng = random.Random(4)
+        boards = [b for b in self.random_boards(rng, 40) if b.get_legal_moves()]
+        batch = BoardBatch.from_boards(boards)
+        moves = [rng.choice(b.get_legal_moves()) for b in boards]
+        batch.apply_moves([r * 7 + c for r, c in moves])
+        expected = BoardBatch.from_boards([b.forecast_move(m) for b, m in zip(boards, moves)])
+        for name in ("blocked", "locations", "active", "move_count"):
+            self.assertTrue((getattr(batch, name) == getattr(expected, name)).all())
+
+    def test_random_playout(self):
+        """ Random playouts end every game with the player to move losing """
+        batch = BoardBatch(50, 5, 5)
+        winners = batch.random_playout(numpy.random.default_rng(5))
+        self.assertTrue(batch.is_terminal().all())
+        self.assertTrue((winners == batch.active ^ 1).all())
+        self.assertTrue((batch.utility(winners) == numpy.inf).all())
+
+
+class GeometryTest(unittest.TestCase):
+
+    def test_knight_moves(self):
+        """ Geometry tables list every in-bounds knight move of each cell """
+        for w, h in [(7, 7), (1, 2), (3, 5), (8, 4)]:
+            geometry = get_geometry(w, h)
+            self.assertIs(geometry, get_geometry(w, h))
+            for cell, (r, c) in enumerate(geometry.cells):
+                expected = [(r + dr, c + dc) for dr in (-2, -1, 1, 2)
+                            for dc in (-2, -1, 1, 2) if abs(dr) != abs(dc) and
+                            0 <= r + dr < h and 0 <= c + dc < w]
+                self.assertEqual(sorted(geometry.moves[r][c]), expected)
+                self.assertEqual([geometry.cells[n] for n in geometry.neighbours[cell]],
+                                 list(geometry.moves[r][c]))
+                self.assertEqual(bin(geometry.masks[cell]).count("1"), len(expected))
+
+class PartitionTest(unittest.TestCase):
+
+    def reference_region(self, board, player):
+        """ Flood fill the blank cells reachable by a player """
+        region, frontier = set(), list(board.get_legal_moves(player))
+        while frontier:
+            cell = frontier.pop()
+            if cell not in region:
+                region.add(cell)
+                frontier.extend(m for m in get_geometry(board.width, board.height).moves[cell[0]][cell[1]]
+                                if board.move_is_legal(m))
+        return region
+
+    def test_random_games(self):
+        """ The players are partitioned when their reachable regions are
+        disjoint """
+        rng = random.Random(7)
+        partitioned = 0
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            for _ in range(20):
+                board = board_cls("p1", "p2", 6, 6)
+                self.assertFalse(board.is_partitioned())
+                while board.get_legal_moves():
+                    board.apply_move(rng.choice(board.get_legal_moves()))
+                    if board.move_count < 2:
+                        continue
+                    regions = [self.reference_region(board, p) for p in ("p1", "p2")]
+                    self.assertEqual(board.is_partitioned(), not regions[0] & regions[1])
+                    partitioned += board.is_partitioned()
+        self.assertGreater(partitioned, 0)
+
+    def assertRegions(self, board):
+        for player in ("p1", "p2"):
+            region = self.reference_region(board, player)
+            if board.get_player_location(player) is None:
+                region = set(board.get_blank_spaces())
+            self.assertEqual(set(board.get_reachable_cells(player)), region)
+            self.assertEqual(board.count_reachable(player), len(region))
+        self.assertEqual(board.regions_overlap(),
+                         bool(set(board.get_reachable_cells("p1")) &
+                              set(board.get_reachable_cells("p2"))))
+
+    def test_reachable_regions(self):
+        """ Cached regions track apply_move(), undo_move() and copy() """
+        rng = random.Random(8)
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            for _ in range(5):
+                board = board_cls("p1", "p2", 6, 6)
+                while board.get_legal_moves():
+                    self.assertRegions(board)
+                    self.assertRegions(board.copy())
+                    board.apply_move(rng.choice(board.get_legal_moves()))
+                self.assertRegions(board)
+                while board.move_count:
+                    board.undo_move()
+                    self.assertRegions(board)
+
+    def test_transformed_regions(self):
+        """ Regions are recomputed after the board is transformed """
+        board = isolation.Board("p1", "p2")
+        for move in [(3, 3), (0, 0), (1, 2), (2, 2)]:
+            board.count_reachable()
+            board.apply_move(move)
+        board = board.transform(1)
+        self.assertRegions(board)
+        board.undo_move()
+        self.assertRegions(board)
+
+    def test_separated_columns(self):
+        """ A knight cannot jump over two blocked columns """
+        board = isolation.Board("p1", "p2")
+        board.__board_state__ = [[0, 0, 0, 1, 1, 0, 0] for _ in range(7)]
+        board.apply_move((0, 0))
+        board.apply_move((0, 6))
+        self.assertTrue(board.is_partitioned())
+        board.undo_move()
+        board.apply_move((3, 2))
+        self.assertFalse(board.is_partitioned())
+
+class OpeningBookTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkstemp(suffix=".bin")[1]
+        self.addCleanup(os.remove, self.path)
+
+    def test_lookup(self):
+        """ A book move is found for every symmetric image of a position """
+        rng = random.Random(9)
+        entries, boards = {}, []
+        for _ in range(30):
+            board = isolation.Board("p1", "p2", 5, 5)
+            for _ in range(rng.randrange(3)):
+                board.apply_move(rng.choice(board.get_legal_moves()))
+            key, transform = position_key(board)
+            move = rng.choice(board.get_legal_moves())
+            row, col = board.transform_move(move, transform)
+            if entries.setdefault(key, row * 5 + col) == row * 5 + col:
+                boards.append((board, move))
+        write_book(self.path, entries, 5, 5, 3)
+
+        book = OpeningBook(self.path)
+        self.addCleanup(book.close)
+        self.assertEqual(len(book), len(entries))
+        for board, move in boards:
+            expected = position_key(board.forecast_move(move))[0]
+            for t in range(8):
+                # symmetric positions may get any of the equivalent moves
+                image = board.transform(t)
+                self.assertEqual(position_key(image.forecast_move(book.lookup(image)))[0],
+                                 expected)
+        board = isolation.Board("p1", "p2", 5, 5)
+        for move in [(0, 0), (4, 4), (2, 1)]:
+            board.apply_move(move)
+        self.assertIsNone(book.lookup(board))
+        self.assertIsNone(book.lookup(isolation.Board("p1", "p2")))
+
+    def test_invalid_file(self):
+        """ Files that are not books are rejected """
+        with open(self.path, "wb") as book_file:
+            book_file.write(b"not a book file")
+        self.assertRaises(ValueError, OpeningBook, self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
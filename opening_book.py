@@ -0,0 +1,90 @@
+"""
+Build the opening book used by `CustomPlayer` (see `isolation.book`): every
+position reached in the first PLIES plies of a game on the default 7x7
+board, reduced by the symmetries of the board, is searched to a fixed depth
+with the alpha-beta search of the student agent, and the best move of each
+position is written to a sorted binary file.
+
+Run with `python opening_book.py`; the book is written to BOOK_PATH.
+"""
+
+import os
+import timeit
+
+from isolation import Board
+from isolation.book import position_key
+from isolation.book import write_book
+from game_agent import CustomPlayer
+from game_agent import custom_score
+
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "opening_book.bin")
+PLIES = 4  # number of plies covered by the book
+DEPTH = 8  # depth of the search of each position
+WIDTH, HEIGHT = 7, 7
+
+
+def opening_positions(plies, width=WIDTH, height=HEIGHT):
+    """Return the canonical positions reached after fewer than `plies` moves
+    in which the player to move has a legal move, as (key, board) pairs.
+    """
+    positions = []
+    level = {}
+    board, _ = Board("p1", "p2", width, height).canonical()
+    level[position_key(board)[0]] = board
+    for ply in range(plies):
+        positions.extend(level.items())
+        if ply + 1 == plies:
+            break
+        children = {}
+        for board in level.values():
+            for move in board.get_legal_moves():
+                child, _ = board.forecast_move(move).canonical()
+                if child.get_legal_moves():
+                    children.setdefault(position_key(child)[0], child)
+        level = children
+    return [(key, board) for key, board in positions if board.get_legal_moves()]
+
+
+def best_move(board, depth, score_fn=custom_score):
+    """Return the move chosen by a fixed-depth alpha-beta search for the
+    player to move on `board`.
+    """
+    player = CustomPlayer(search_depth=depth, score_fn=score_fn, iterative=False,
+                          method='alphabeta', inplace=True, tt_size=2 ** 16,
+                          ordering=('killer', 'history'))
+    player.q1, player.q2, player.q3, player.q4, player.b1, player.b2, player.b3, player.b4 = \
+        player.create_quarter(board.width, board.height)
+    if board.active_player == board.__player_1__:
+        game = Board.from_int(board.to_int(), player, "opponent")
+    else:
+        game = Board.from_int(board.to_int(), "opponent", player)
+    player.time_left = lambda: float("inf")
+    _, move = player.alphabeta(game, depth)
+    return move
+
+
+def build_book(path=BOOK_PATH, plies=PLIES, depth=DEPTH, width=WIDTH, height=HEIGHT,
+               score_fn=custom_score, verbose=False):
+    """Search the opening positions and write their best moves to a book
+    file. Return the number of positions written.
+    """
+    entries = {}
+    start = timeit.default_timer()
+    positions = opening_positions(plies, width, height)
+    for idx, (key, board) in enumerate(positions):
+        row, col = best_move(board, depth, score_fn)
+        entries[key] = row * width + col
+        if verbose and (idx + 1) % 100 == 0:
+            print("{:>6} / {} positions, {:.0f}s".format(
+                idx + 1, len(positions), timeit.default_timer() - start))
+    write_book(path, entries, width, height, plies)
+    return len(entries)
+
+
+def main():
+    count = build_book(verbose=True)
+    print("Wrote {} positions to {}".format(count, BOOK_PATH))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,805 @@
+"""
+This file contains test cases for the optional search features of
+`game_agent.CustomPlayer`, which must leave the result of the search
+unchanged while expanding fewer nodes.
+"""
+import os
+import random
+import tempfile
+import time
+import timeit
+import unittest
+
+import isolation
+import game_agent
+import opening_book
+
+from isolation.geometry import get_geometry
+from sample_players import improved_score
+
+
+def random_positions(count, plies, seed=0, width=7, height=7):
+    """Return a list of boards reached by playing random opening moves."""
+    rng = random.Random(seed)
+    boards = []
+    while len(boards) < count:
+        board = isolation.Board("p1", "p2", width, height)
+        for _ in range(plies):
+            legal_moves = board.get_legal_moves()
+            if not legal_moves:
+                break
+            board.apply_move(rng.choice(legal_moves))
+        if board.get_legal_moves():
+            boards.append(board)
+    return boards
+
+
+def make_agent(method="alphabeta", score_fn=improved_score, **kwargs):
+    """Return a fixed-depth alpha-beta agent that never times out."""
+    agent = game_agent.CustomPlayer(score_fn=score_fn, iterative=False,
+                                    method=method, **kwargs)
+    agent.time_left = lambda: 1e3
+    return agent
+
+
+def search(agent, board, depth):
+    """Search a board for the player to move and count the expanded nodes."""
+    board = board_for(agent, board)
+    nodes = [0]
+    time_left = agent.time_left
+
+    def counting_time_left():
+        nodes[0] += 1
+        return time_left()
+
+    agent.time_left = counting_time_left
+    try:
+        score, move = agent.alphabeta(board, depth)
+    finally:
+        agent.time_left = time_left
+    return score, move, nodes[0]
+
+
+def time_limit(milliseconds):
+    """Return a time_left() function for a turn of the given duration."""
+    deadline = timeit.default_timer() + milliseconds / 1000.
+    return lambda: 1000 * (deadline - timeit.default_timer())
+
+
+def board_for(agent, board):
+    """Return a copy of a board where the agent is the player to move."""
+    if board.active_player == board.__player_1__:
+        return isolation.Board.from_int(board.to_int(), agent, "opponent")
+    return isolation.Board.from_int(board.to_int(), "opponent", agent)
+
+
+class TranspositionTableTest(unittest.TestCase):
+
+    def test_bounds(self):
+        """ Stored bounds only settle the windows they fall outside of """
+        tt = game_agent.TranspositionTable(16)
+        tt.store(5, 3, 0., 10., 4., (1, 2))
+        self.assertEqual(tt.probe(5, 3, -1., 1.), (4., (1, 2)))
+        self.assertEqual(tt.probe(5, 4, -1., 1.), (None, (1, 2)))
+        self.assertEqual(tt.probe(21, 1, -1., 1.), (None, None))
+
+        tt.store(6, 3, 0., 10., 12., (2, 2))
+        self.assertEqual(tt.probe(6, 2, 0., 10.), (12., (2, 2)))
+        self.assertEqual(tt.probe(6, 2, 0., 20.), (None, (2, 2)))
+
+        tt.store(7, 3, 0., 10., -5., (3, 2))
+        self.assertEqual(tt.probe(7, 2, 0., 10.), (-5., (3, 2)))
+        self.assertEqual(tt.probe(7, 2, -10., 10.), (None, (3, 2)))
+
+    def test_replacement(self):
+        """ The depth policy keeps the deeper entry of a slot """
+        for policy, kept in (("depth", (2, 2)), ("always", (3, 3))):
+            tt = game_agent.TranspositionTable(4, policy)
+            tt.store(1, 5, 0., 1., .5, (2, 2))
+            tt.store(5, 2, 0., 1., .5, (3, 3))
+            self.assertEqual(len(tt), 1)
+            self.assertEqual(tt.table[1][4], kept)
+        self.assertRaises(ValueError, game_agent.TranspositionTable, 4, "never")
+
+    def test_same_score(self):
+        """ Deepening alphabeta() returns the same scores with the table, and
+        expands fewer nodes """
+        plain_nodes, cached_nodes = 0, 0
+        for board in random_positions(5, 4):
+            plain = make_agent()
+            cached = make_agent(tt_size=2 ** 12, inplace=True)
+            for depth in range(1, 6):
+                score, _, nodes = search(plain, board, depth)
+                plain_nodes += nodes
+                tt_score, _, nodes = search(cached, board, depth)
+                cached_nodes += nodes
+                self.assertEqual(score, tt_score)
+            self.assertGreater(len(cached.tt), 0)
+        self.assertLess(cached_nodes, plain_nodes)
+
+
+class MoveOrderingTest(unittest.TestCase):
+
+    def test_same_score(self):
+        """ Ordered alphabeta() returns the same scores, and expands fewer
+        nodes """
+        orderings = [("killer",), ("history",), ("mobility",),
+                     ("killer", "history", "mobility")]
+        for board in random_positions(5, 4, seed=1):
+            plain = make_agent()
+            ordered = [make_agent(ordering=o, inplace=True) for o in orderings]
+            plain_nodes, ordered_nodes = 0, [0] * len(ordered)
+            for depth in range(1, 6):
+                score, _, nodes = search(plain, board, depth)
+                plain_nodes += nodes
+                for idx, agent in enumerate(ordered):
+                    ordered_score, _, nodes = search(agent, board, depth)
+                    ordered_nodes[idx] += nodes
+                    self.assertEqual(score, ordered_score)
+            self.assertLess(min(ordered_nodes), plain_nodes)
+
+    def test_order_moves(self):
+        """ order_moves() sorts a copy of the cached legal moves """
+        agent = make_agent(ordering=("killer", "history", "mobility"))
+        board = [b for b in random_positions(5, 6, seed=2)
+                 if len(b.get_legal_moves()) >= 4][0]
+        legal_moves = board.get_legal_moves()
+        before = list(legal_moves)
+        agent.root_depth = 3
+        agent.killers[1] = [legal_moves[-1]]
+        agent.history[legal_moves[-2]] = 10
+        ordered = agent.order_moves(board, legal_moves, 2, legal_moves[1])
+        self.assertEqual(ordered[:3], [before[1], before[-1], before[-2]])
+        self.assertEqual(sorted(ordered), sorted(before))
+        self.assertEqual(legal_moves, before)
+        self.assertEqual(board.get_legal_moves(), before)
+
+    def test_unknown_ordering(self):
+        self.assertRaises(ValueError, make_agent, ordering=("random",))
+
+
+class PrincipalVariationTest(unittest.TestCase):
+
+    def test_principal_variation(self):
+        """ The principal variation is a legal line starting with the best
+        move, and reusing it leaves the scores unchanged """
+        for board in random_positions(5, 4, seed=3):
+            plain = make_agent()
+            agent = make_agent(pv_reuse=True, inplace=True)
+            for depth in range(1, 6):
+                score, _, _ = search(plain, board, depth)
+                pv_board = board_for(agent, board)
+                pv_score, move, pv = agent.alphabeta(pv_board, depth,
+                                                     return_pv=True)
+                self.assertEqual(score, pv_score)
+                self.assertEqual(pv[0], move)
+                self.assertLessEqual(len(pv), depth)
+                for m in pv:
+                    self.assertIn(m, pv_board.get_legal_moves())
+                    pv_board.apply_move(m)
+
+    def test_root_tt_hit(self):
+        """ A search answered by the transposition table at the root keeps
+        the principal variation """
+        agent = make_agent(pv_reuse=True, inplace=True, tt_size=2 ** 12)
+        for board in random_positions(5, 4, seed=3):
+            board = board_for(agent, board)
+            score, move, pv = agent.alphabeta(board, 4, return_pv=True)
+            self.assertEqual(agent.alphabeta(board, 4, return_pv=True), (score, move, pv))
+            self.assertGreater(len(pv), 1)
+
+    def test_pv_required(self):
+        agent = make_agent()
+        board = board_for(agent, random_positions(1, 2)[0])
+        self.assertRaises(ValueError, agent.alphabeta, board, 2, return_pv=True)
+
+
+class PrincipalVariationSearchTest(unittest.TestCase):
+
+    def test_same_score(self):
+        """ PVS returns the same scores as alpha-beta, also for heuristics
+        with fractional scores """
+        for score_fn in (improved_score, game_agent.custom_score_center):
+            for board in random_positions(5, 4, seed=4):
+                plain = make_agent(score_fn=score_fn)
+                pvs = make_agent("pvs", score_fn=score_fn, inplace=True,
+                                 ordering=("killer", "history"))
+                for depth in range(1, 6):
+                    self.assertEqual(search(plain, board, depth)[0],
+                                     search(pvs, board, depth)[0])
+
+    def test_aspiration(self):
+        """ Aspiration windows return the full-window score for any guess """
+        agent = make_agent(aspiration=1.)
+        for board in random_positions(5, 6, seed=5):
+            board = board_for(agent, board)
+            score, _ = agent.alphabeta(board, 4)
+            for guess in (None, score, score - 3., score + 3., float("inf")):
+                self.assertEqual(agent.aspiration_search(board, 4, guess)[0],
+                                 score)
+
+    def test_get_move(self):
+        """ get_move() returns a legal move with the 'pvs' method """
+        agent = game_agent.CustomPlayer(score_fn=improved_score, method="pvs",
+                                        aspiration=1.)
+        for board in random_positions(3, 4, seed=6):
+            board = board_for(agent, board)
+            legal_moves = board.get_legal_moves()
+            move = agent.get_move(board, legal_moves, time_limit(50.))
+            self.assertIn(move, legal_moves)
+
+
+class PonderTest(unittest.TestCase):
+
+    def test_ponder(self):
+        """ The pondering search is handed over when the opponent plays the
+        predicted reply, and discarded otherwise """
+        for hit in (True, False):
+            agent = game_agent.CustomPlayer(score_fn=improved_score,
+                                            method="alphabeta", ponder=100.,
+                                            tt_size=2 ** 12, pv_reuse=True)
+            board = board_for(agent, random_positions(1, 4, seed=7)[0])
+            move = agent.get_move(board, board.get_legal_moves(), time_limit(50.))
+            self.assertIsNotNone(agent.ponder_thread)
+
+            board.apply_move(move)
+            replies = board.get_legal_moves()
+            predicted = [m for m in replies
+                         if board.forecast_move(m).get_hash() == agent.ponder_hash]
+            self.assertEqual(len(predicted), 1)
+            if hit:
+                board.apply_move(predicted[0])
+            else:
+                board.apply_move([m for m in replies if m != predicted[0]][0])
+            time.sleep(0.05)
+
+            result = agent.stop_pondering(board)
+            self.assertIsNone(agent.ponder_thread)
+            if hit:
+                depth, score, best_move = result
+                self.assertGreaterEqual(depth, 1)
+                self.assertIn(best_move, board.get_legal_moves())
+            else:
+                self.assertIsNone(result)
+
+    def test_stale_pv(self):
+        """ The principal variation is only carried over to the pondering
+        search when it starts with the move played """
+        agent = game_agent.CustomPlayer(score_fn=improved_score,
+                                        method="alphabeta", ponder=100.,
+                                        pv_reuse=True)
+        board = board_for(agent, random_positions(1, 4, seed=7)[0])
+        move, other = board.get_legal_moves()[:2]
+        reply = agent.predict_reply(board, other)
+        # record the principal variation the pondering search starts from
+        started = []
+        agent.ponder_search = lambda game, stop: started.append(list(agent.pv))
+        agent.pv = [move, reply, move, reply]
+        agent.start_pondering(board, other)
+        agent.stop_pondering(board)
+        self.assertEqual(started, [[]])
+
+    def test_play(self):
+        """ Pondering players complete a game """
+        players = [game_agent.CustomPlayer(score_fn=improved_score,
+                                           method="alphabeta", ponder=20.,
+                                           timeout=25., pv_reuse=True)
+                   for _ in range(2)]
+        board = isolation.Board(players[0], players[1], 5, 5)
+        winner, history, termination = board.play(time_limit=50)
+        self.assertIn(winner, players)
+        self.assertNotEqual(termination, "timeout")
+
+    def test_play_default_timeout(self):
+        """ Starting the pondering thread does not make an adaptive player
+        with the default timeout lose on time """
+        for seed in range(4):
+            player = game_agent.CustomPlayer(score_fn=improved_score,
+                                             method="alphabeta", ponder=50.,
+                                             adaptive_time=True, pv_reuse=True,
+                                             check_interval='auto')
+            opponent = game_agent.CustomPlayer(score_fn=improved_score,
+                                               method="alphabeta")
+            players = (player, opponent) if seed % 2 == 0 else (opponent, player)
+            board = isolation.Board(players[0], players[1])
+            rng = random.Random(seed)
+            board.apply_move(rng.choice(board.get_legal_moves()))
+            board.apply_move(rng.choice(board.get_legal_moves()))
+            winner, history, termination = board.play(time_limit=150)
+            player.stop_pondering(board)
+            self.assertFalse(termination == "timeout" and winner is opponent)
+
+
+class ParallelSearchTest(unittest.TestCase):
+
+    def test_worker_search(self):
+        """ The root moves searched by each worker together give the score of
+        the full search """
+        game_agent.init_parallel_worker(dict(score_fn=improved_score,
+                                             method="alphabeta", timeout=0.))
+        for board in random_positions(3, 4, seed=8):
+            agent = make_agent()
+            board = board_for(agent, board)
+            legal_moves = board.get_legal_moves()
+            # the workers run one after the other, each with its own deadline
+            results = [game_agent.parallel_worker_search(
+                           type(board), board.to_int(), 0, legal_moves[idx::2],
+                           timeit.default_timer() + 0.05)
+                       for idx in range(2)]
+            depth = min(len(r) for r in results)
+            self.assertGreaterEqual(depth, 2)
+            for d in range(1, depth + 1):
+                score, move = agent.alphabeta(board, d)
+                self.assertEqual(max(r[d - 1][0] for r in results), score)
+
+    def test_get_move(self):
+        """ get_move() returns a legal move with worker processes """
+        agent = game_agent.CustomPlayer(score_fn=improved_score,
+                                        method="alphabeta", workers=2)
+        try:
+            for board in random_positions(2, 4, seed=9):
+                board = board_for(agent, board)
+                legal_moves = board.get_legal_moves()
+                move = agent.get_move(board, legal_moves, time_limit(100.))
+                self.assertIn(move, legal_moves)
+                self.assertGreater(agent.completed_depth, 0)
+        finally:
+            agent.close()
+        self.assertIsNone(agent.pool)
+
+
+class PersistentStateTest(unittest.TestCase):
+
+    def test_new_game(self):
+        """ Boards that do not follow the previous one start a new game """
+        agent = make_agent()
+        board = isolation.Board(agent, "opponent")
+        self.assertTrue(agent.is_new_game(board))
+        board.apply_move((3, 3))
+        board.apply_move((0, 0))
+        self.assertFalse(agent.is_new_game(board))
+        self.assertTrue(agent.is_new_game(board))
+        board.apply_move((1, 2))
+        board.apply_move((2, 2))
+        self.assertFalse(agent.is_new_game(board))
+        self.assertTrue(agent.is_new_game(isolation.Board(agent, "opponent")))
+        other = isolation.Board(agent, "opponent")
+        other.apply_move((3, 3))
+        other.apply_move((0, 1))
+        self.assertFalse(agent.is_new_game(other))
+        self.assertTrue(agent.is_new_game(board))
+
+    def test_persistent(self):
+        """ The search state is kept between the moves of a game, and reset
+        when a new game starts """
+        agent = game_agent.CustomPlayer(5, improved_score, False, "alphabeta",
+                                        tt_size=2 ** 12, pv_reuse=True,
+                                        ordering=("killer", "history"),
+                                        persistent=True)
+        board = board_for(agent, random_positions(1, 4, seed=10)[0])
+        move = agent.get_move(board, board.get_legal_moves(), lambda: 1e3)
+        self.assertGreater(len(agent.tt), 0)
+        pv = agent.pv
+        self.assertEqual(pv[0], move)
+
+        # without time to search, the move is taken from the carried PV
+        board.apply_move(move)
+        board.apply_move(pv[1])
+        self.assertNotEqual(board.get_legal_moves()[0], pv[2])
+        self.assertEqual(agent.get_move(board, board.get_legal_moves(),
+                                        lambda: 0.), pv[2])
+        self.assertGreater(len(agent.tt), 0)
+        self.assertEqual(agent.tt.generation, 1)
+        self.assertEqual(agent.pv, pv[2:])
+
+        board = board_for(agent, random_positions(1, 4, seed=11)[0])
+        agent.get_move(board, board.get_legal_moves(), lambda: 0.)
+        self.assertEqual(len(agent.tt), 0)
+        self.assertEqual(agent.pv, [])
+
+
+def endgame_positions(count, blanks, seed=0, width=5, height=5):
+    """Return boards reached by random play with at most the given number
+    of blank cells left and legal moves for the player to move."""
+    rng = random.Random(seed)
+    boards = []
+    while len(boards) < count:
+        board = isolation.Board("p1", "p2", width, height)
+        while board.get_legal_moves() and len(board.get_blank_spaces()) > blanks:
+            board.apply_move(rng.choice(board.get_legal_moves()))
+        if board.get_legal_moves():
+            boards.append(board)
+    return boards
+
+
+class ProvenResultTest(unittest.TestCase):
+
+    def test_early_exit(self):
+        """ Iterative deepening stops once the result is exact """
+        agent = game_agent.CustomPlayer(score_fn=improved_score,
+                                        method="alphabeta")
+        for board in endgame_positions(10, 8):
+            board = board_for(agent, board)
+            legal_moves = board.get_legal_moves()
+            start = timeit.default_timer()
+            move = agent.get_move(board, legal_moves, time_limit(5000.))
+            self.assertLess(timeit.default_timer() - start, 1.)
+            self.assertIn(move, legal_moves)
+            self.assertTrue(agent.exact)
+            self.assertLessEqual(agent.completed_depth,
+                                 len(board.get_blank_spaces()))
+
+    def test_exact_flag(self):
+        """ A search is exact only if it never evaluates a cut-off leaf """
+        agent = make_agent()
+        board = board_for(agent, random_positions(1, 4)[0])
+        agent.alphabeta(board, 3)
+        self.assertFalse(agent.exact)
+        board = board_for(agent, endgame_positions(1, 6, seed=1)[0])
+        agent.alphabeta(board, len(board.get_blank_spaces()))
+        self.assertTrue(agent.exact)
+
+    def test_lost_position(self):
+        """ get_move() returns a legal move when every move loses """
+        agent = game_agent.CustomPlayer(score_fn=improved_score,
+                                        method="alphabeta")
+        lost = 0
+        for board in endgame_positions(20, 8, seed=2):
+            board = board_for(agent, board)
+            agent.time_left = lambda: 1e3
+            if agent.alphabeta(board, 8)[0] != float("-inf"):
+                continue
+            lost += 1
+            legal_moves = board.get_legal_moves()
+            self.assertIn(agent.get_move(board, legal_moves, time_limit(500.)),
+                          legal_moves)
+        self.assertGreater(lost, 0)
+
+
+class TimeManagerTest(unittest.TestCase):
+
+    def test_predict(self):
+        """ The next iteration is predicted from the branching factor of the
+        previous ones """
+        manager = game_agent.TimeManager(10.)
+        self.assertTrue(manager.can_start(11.))
+        self.assertFalse(manager.can_start(10.))
+        manager.iteration_done(1.)
+        self.assertEqual(manager.predict(), 8.)
+        manager.iteration_done(3.)
+        self.assertEqual(manager.predict(), 9.)
+        manager.iteration_done(4.)
+        self.assertEqual(manager.predict(), 8.)
+        self.assertTrue(manager.can_start(18.5))
+        self.assertFalse(manager.can_start(17.5))
+        manager.start_move()
+        self.assertEqual(manager.predict(), 0.)
+
+    def test_calibration(self):
+        """ The safety margin follows the slowest recent abort """
+        manager = game_agent.TimeManager(10.)
+        manager.timed_out(9.)
+        self.assertEqual(manager.threshold, 2.)
+        manager.timed_out(-1.)
+        self.assertEqual(manager.threshold, 6.)
+        for _ in range(manager.SAMPLES):
+            manager.timed_out(manager.threshold)
+        self.assertEqual(manager.threshold, manager.min_threshold)
+
+    def test_get_move(self):
+        """ get_move() returns before the timer expires without starting
+        iterations that cannot finish """
+        agent = game_agent.CustomPlayer(score_fn=improved_score,
+                                        method="alphabeta", adaptive_time=True)
+        for board in random_positions(5, 4, seed=12):
+            board = board_for(agent, board)
+            legal_moves = board.get_legal_moves()
+            time_left = time_limit(50.)
+            self.assertIn(agent.get_move(board, legal_moves, time_left),
+                          legal_moves)
+            self.assertGreater(time_left(), 0.)
+            self.assertGreater(agent.completed_depth, 0)
+        self.assertEqual(agent.TIMER_THRESHOLD, agent.time_manager.threshold)
+
+
+class CheckIntervalTest(unittest.TestCase):
+
+    def test_same_score(self):
+        """ Reading the timer every few nodes gives the same result with
+        fewer reads """
+        for board in random_positions(5, 4, seed=13):
+            plain = make_agent()
+            sparse = make_agent(check_interval=16)
+            score, move, reads = search(plain, board, 4)
+            sparse_score, sparse_move, sparse_reads = search(sparse, board, 4)
+            self.assertEqual((sparse_score, sparse_move), (score, move))
+            self.assertLess(sparse_reads, reads / 8)
+
+    def test_tuning(self):
+        """ The automatic interval grows while the clock moves slower than
+        the target granularity, and shrinks when it moves faster """
+        board = random_positions(1, 4, seed=13)[0]
+        agent = make_agent(check_interval='auto')
+        search(agent, board, 5)
+        self.assertGreater(agent.node_interval, 16)
+
+        clock = [1e6]
+        def time_left():
+            clock[0] -= 100.
+            return clock[0]
+        agent.start_timer(time_left)
+        search(agent, board, 5)
+        self.assertEqual(agent.node_interval, 1)
+
+    def test_get_move(self):
+        """ get_move() returns before the timer expires """
+        agent = game_agent.CustomPlayer(score_fn=improved_score, method="alphabeta",
+                                        inplace=True, check_interval='auto')
+        for board in random_positions(5, 4, seed=14):
+            board = board_for(agent, board)
+            legal_moves = board.get_legal_moves()
+            time_left = time_limit(50.)
+            self.assertIn(agent.get_move(board, legal_moves, time_left),
+                          legal_moves)
+            self.assertGreater(time_left(), 0.)
+            self.assertGreater(agent.node_interval, 1)
+
+    def test_invalid_interval(self):
+        """ The interval is a positive number of nodes or 'auto' """
+        for interval in (0, 2.5, 'fast'):
+            with self.assertRaises(ValueError):
+                game_agent.CustomPlayer(check_interval=interval)
+
+def partitioned_positions(count, seed=0, width=5, height=5):
+    """Return boards reached by random play until the players are
+    partitioned, with legal moves for the player to move."""
+    rng = random.Random(seed)
+    boards = []
+    while len(boards) < count:
+        board = isolation.Board("p1", "p2", width, height)
+        while board.get_legal_moves() and not board.is_partitioned():
+            board.apply_move(rng.choice(board.get_legal_moves()))
+        if board.get_legal_moves():
+            boards.append(board)
+    return boards
+
+
+class EndgameSolverTest(unittest.TestCase):
+
+    def test_same_score(self):
+        """ The solver agrees with a search to the end of the game """
+        solver = game_agent.EndgameSolver()
+        for board in partitioned_positions(30, seed=15):
+            agent = make_agent(inplace=True)
+            board = board_for(agent, board)
+            score, move = solver.solve(board)
+            self.assertIn(move, board.get_legal_moves())
+            self.assertEqual(agent.alphabeta(board, len(board.get_blank_spaces()))[0], score)
+            if score > 0:
+                self.assertEqual(solver.solve(board.forecast_move(move))[0], float("-inf"))
+
+    def test_longest_path(self):
+        """ The longest path is only cut short when asked to """
+        solver = game_agent.EndgameSolver()
+        solver.geometry = get_geometry(3, 4)
+        region = (1 << 12) - 2
+        self.assertEqual(solver.longest_path(0, region, target=3), 3)
+        # a 3x4 board has an open knight's tour starting from a corner
+        self.assertEqual(solver.longest_path(0, region), 11)
+        self.assertEqual(solver.longest_path(0, region, target=3), 11)
+
+    def test_bounded_opponent(self):
+        """ The path of the opponent is only searched up to the longest path
+        the player to move could have """
+        board = isolation.Board("p1", "p2")
+        board.__board_state__ = [[0, 0, 1, 1, 0, 0, 0] for _ in range(7)]
+        board.apply_move((0, 0))
+        board.apply_move((0, 6))
+        ticks = []
+        solver = game_agent.EndgameSolver()
+        score, move = solver.solve(board, lambda: ticks.append(1))
+        self.assertEqual(score, float("-inf"))
+        self.assertIn(move, board.get_legal_moves())
+
+        unbounded = []
+        solver.clear()
+        solver.longest_path(board.__player_cell__("p2"), board.__open_mask__(),
+                            tick=lambda: unbounded.append(1))
+        self.assertLess(10 * len(ticks), len(unbounded))
+
+    def test_solver_timeout(self):
+        """ get_move() searches the position when the solver runs out of
+        time """
+        def endless_solve(game, tick):
+            while True:
+                tick()
+
+        agent = game_agent.CustomPlayer(score_fn=improved_score, method="alphabeta",
+                                        endgame=True)
+        agent.endgame.solve = endless_solve
+        board = isolation.Board(agent, "opponent")
+        board.__board_state__ = [[0, 0, 0, 1, 1, 0, 0] for _ in range(7)]
+        board.apply_move((0, 0))
+        board.apply_move((0, 6))
+        legal_moves = board.get_legal_moves()
+        time_left = time_limit(100.)
+        move = agent.get_move(board, legal_moves, time_left)
+        self.assertFalse(agent.solved)
+        self.assertIn(move, legal_moves)
+        self.assertGreaterEqual(agent.completed_depth, 1)
+        self.assertGreater(time_left(), 0.)
+
+    def test_get_move(self):
+        """ get_move() switches to the solver once the players are
+        partitioned """
+        agent = game_agent.CustomPlayer(score_fn=improved_score, method="alphabeta",
+                                        endgame=True)
+        board = isolation.Board(agent, "opponent")
+        board.__board_state__ = [[0, 0, 0, 1, 1, 0, 0] for _ in range(7)]
+        board.apply_move((0, 0))
+        board.apply_move((0, 6))
+        legal_moves = board.get_legal_moves()
+        time_left = time_limit(5000.)
+        move = agent.get_move(board, legal_moves, time_left)
+        self.assertTrue(agent.solved)
+        self.assertGreater(time_left(), 4900.)
+        self.assertEqual(agent.endgame.solve(board.forecast_move(move))[0], float("-inf"))
+
+        board = board_for(agent, random_positions(1, 4)[0])
+        agent.get_move(board, board.get_legal_moves(), time_limit(50.))
+        self.assertFalse(agent.solved)
+
+    def test_memo_kept(self):
+        """ The solver table is kept from one move to the next without
+        persistent search state, within its size """
+        agent = game_agent.CustomPlayer(score_fn=improved_score, method="alphabeta",
+                                        endgame=True, endgame_size=2 ** 10)
+        self.assertEqual(agent.endgame.max_entries, 2 ** 10)
+        board = isolation.Board(agent, "opponent")
+        board.__board_state__ = [[0, 0, 1, 1, 0, 0, 0] for _ in range(7)]
+        board.apply_move((0, 0))
+        board.apply_move((0, 6))
+        move = agent.get_move(board, board.get_legal_moves(), time_limit(5000.))
+        entries = len(agent.endgame)
+        self.assertGreater(entries, 0)
+
+        board.apply_move(move)
+        board.apply_move(board.get_legal_moves()[0])
+        agent.get_move(board, board.get_legal_moves(), time_limit(5000.))
+        self.assertTrue(agent.solved)
+        self.assertGreaterEqual(len(agent.endgame), entries)
+        self.assertLessEqual(len(agent.endgame), 2 ** 10)
+
+class OpeningBookTest(unittest.TestCase):
+
+    def test_get_move(self):
+        """ get_move() plays the book move of the positions in the book """
+        path = tempfile.mkstemp(suffix=".bin")[1]
+        self.addCleanup(os.remove, path)
+        self.assertEqual(opening_book.build_book(path, plies=3, depth=2, width=5, height=5,
+                                                 score_fn=improved_score),
+                         len(opening_book.opening_positions(3, 5, 5)))
+
+        agent = game_agent.CustomPlayer(score_fn=improved_score, method="alphabeta",
+                                        book=path)
+        self.addCleanup(agent.close)
+        for board in random_positions(10, 2, seed=16, width=5, height=5):
+            board = board_for(agent, board)
+            legal_moves = board.get_legal_moves()
+            time_left = time_limit(5000.)
+            move = agent.get_move(board, legal_moves, time_left)
+            self.assertIn(move, legal_moves)
+            self.assertGreater(time_left(), 4990.)
+            self.assertEqual(move, agent.book.lookup(board))
+        board = board_for(agent, random_positions(1, 3, seed=16, width=5, height=5)[0])
+        self.assertIsNone(agent.book.lookup(board))
+
+class MonteCarloTest(unittest.TestCase):
+
+    def test_tree(self):
+        """ Every playout is counted once along its path """
+        agent = game_agent.CustomPlayer(method="mcts")
+        board = board_for(agent, random_positions(1, 4, seed=17)[0])
+        agent.start_timer(time_limit(50.))
+        root = agent.mcts(board)
+        self.assertGreater(agent.playouts, 0)
+        self.assertEqual(root.visits, agent.playouts)
+        nodes = [root]
+        while nodes:
+            node = nodes.pop()
+            self.assertLessEqual(node.wins, node.visits)
+            if node.children:
+                # the first playout through a node is the one that added it
+                self.assertEqual(sum(c.visits for c in node.children) + (node is not root),
+                                 node.visits)
+            nodes.extend(node.children)
+        self.assertEqual(sorted(c.move for c in root.children),
+                         sorted(board.get_legal_moves()))
+
+    def test_winning_move(self):
+        """ A won endgame is converted into a win """
+        found = 0
+        for board in endgame_positions(20, 10, seed=18):
+            agent = game_agent.CustomPlayer(method="mcts", rollout="mobility")
+            board = board_for(agent, board)
+            if not any(not board.forecast_move(m).get_legal_moves()
+                       for m in board.get_legal_moves()):
+                continue
+            found += 1
+            time_left = time_limit(50.)
+            move = agent.get_move(board, board.get_legal_moves(), time_left)
+            self.assertGreater(time_left(), 0.)
+            solver = make_agent()
+            child = board_for(solver, board).forecast_move(move)
+            self.assertEqual(solver.alphabeta(child, 10, maximizing_player=False)[0],
+                             float("inf"))
+        self.assertGreater(found, 0)
+
+    def test_get_move(self):
+        """ get_move() returns a legal move in time with each rollout policy
+        and with worker processes """
+        for kwargs in (dict(rollout="random"), dict(rollout="mobility"), dict(workers=2)):
+            agent = game_agent.CustomPlayer(method="mcts", **kwargs)
+            try:
+                for board in random_positions(2, 4, seed=19):
+                    board = board_for(agent, board)
+                    legal_moves = board.get_legal_moves()
+                    time_left = time_limit(100.)
+                    self.assertIn(agent.get_move(board, legal_moves, time_left), legal_moves)
+                    self.assertGreater(time_left(), 0.)
+                    self.assertGreater(agent.playouts, 0)
+            finally:
+                agent.close()
+
+    def test_unknown_rollout(self):
+        """ Only the listed rollout policies are accepted """
+        with self.assertRaises(ValueError):
+            game_agent.CustomPlayer(method="mcts", rollout="greedy")
+
+class EvaluationCacheTest(unittest.TestCase):
+
+    def test_counters(self):
+        """ The least recently used score is evicted from a full cache """
+        calls = []
+
+        def score_fn(game, player):
+            calls.append(game.get_hash())
+            return float(len(calls))
+
+        cache = game_agent.EvaluationCache(score_fn, size=2)
+        boards = random_positions(3, 4, seed=20)
+        self.assertEqual(cache(boards[0], "p1"), 1.)
+        self.assertEqual(cache(boards[1], "p1"), 2.)
+        self.assertEqual(cache(boards[0], "p1"), 1.)
+        self.assertEqual(cache(boards[0], "p2"), 3.)
+        self.assertEqual((cache.hits, cache.misses, cache.evictions), (1, 3, 1))
+        # boards[1] was the least recently used score
+        self.assertEqual(cache(boards[0], "p1"), 1.)
+        self.assertEqual(cache(boards[1], "p1"), 4.)
+        self.assertEqual((cache.hits, cache.misses, cache.evictions, len(cache)), (2, 4, 2, 2))
+        cache.clear()
+        self.assertEqual((cache.hits, cache.misses, cache.evictions, len(cache)), (0, 0, 0, 0))
+
+    def test_same_score(self):
+        """ A search with the cache gives the same result, and a repeated
+        search evaluates every leaf from the cache """
+        for board in random_positions(5, 4, seed=21):
+            plain = make_agent(score_fn=game_agent.custom_score)
+            cached = make_agent(score_fn=game_agent.custom_score, eval_cache=2 ** 12)
+            for agent in (plain, cached):
+                agent.q1, agent.q2, agent.q3, agent.q4, agent.b1, agent.b2, agent.b3, agent.b4 = \
+                    agent.create_quarter(board.width, board.height)
+            self.assertEqual(search(cached, board, 4)[:2], search(plain, board, 4)[:2])
+            misses = cached.score.misses
+            self.assertEqual(search(cached, board, 4)[:2], search(plain, board, 4)[:2])
+            self.assertEqual(cached.score.misses, misses)
+            self.assertGreater(cached.score.hits, 0)
+
+    def test_invalid_size(self):
+        """ The cache holds at least one score """
+        with self.assertRaises(ValueError):
+            game_agent.EvaluationCache(improved_score, size=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -20,6 +20,7 @@ initiative in the second match with agentB at (5, 2) as player 1 and agentA at
 """
 
 import itertools
+import os
 import random
 import warnings
 
@@ -38,6 +39,7 @@ from game_agent import custom_score_h1_begin_mixed
 from game_agent import custom_score_h1_begin_distance
 from game_agent import custom_score_distance
 from game_agent import custom_score_center
+from opening_book import BOOK_PATH
 
 NUM_MATCHES = 125  # number of matches against each opponent
 TIME_LIMIT = 150  # number of milliseconds before timeout
@@ -148,7 +150,15 @@ def main():
                   ("Improved", improved_score)]
     AB_ARGS = {"search_depth": 5, "method": 'alphabeta', "iterative": False}
     MM_ARGS = {"search_depth": 3, "method": 'minimax', "iterative": False}
-    CUSTOM_ARGS = {"method": 'alphabeta', 'iterative': True}
+    CUSTOM_ARGS = {"method": 'alphabeta', 'iterative': True, 'inplace': True,
+                   'tt_size': 2 ** 16, 'ordering': ('killer', 'history'),
+                   'pv_reuse': True, 'persistent': True, 'adaptive_time': True,
+                   'check_interval': 'auto', 'endgame': True, 'eval_cache': 2 ** 16}
+    if os.path.exists(BOOK_PATH):
+        # built by `python opening_book.py`
+        CUSTOM_ARGS['book'] = BOOK_PATH
+    PVS_ARGS = dict(CUSTOM_ARGS, method='pvs', aspiration=1.)
+    MCTS_ARGS = {"method": 'mcts', 'rollout': 'mobility'}
 
     # Create a collection of CPU agents using fixed-depth minimax or alpha beta
     # search, or random selection.  The agent names encode the search method
@@ -166,7 +176,9 @@ def main():
     # systems; i.e., the performance of the student agent is considered
     # relative to the performance of the ID_Improved agent to account for
     # faster or slower computers.
-    test_agents = [Agent(CustomPlayer(score_fn=custom_score, **CUSTOM_ARGS), "Student")]
+    test_agents = [Agent(CustomPlayer(score_fn=custom_score, **CUSTOM_ARGS), "Student"),
+                   Agent(CustomPlayer(score_fn=custom_score, **PVS_ARGS), "Student_PVS"),
+                   Agent(CustomPlayer(**MCTS_ARGS), "Student_MCTS")]
 
     print(DESCRIPTION)
     for agentUT in test_agents: